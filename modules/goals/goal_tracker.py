@@ -1,49 +1,203 @@
 import logging
-import json
-import os
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-import uuid
+import sys
+import atexit
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Union
+from datetime import date, datetime, timedelta
+import secrets
+
+from ..tracker_base import LogStore, locked
 
 logger = logging.getLogger(__name__)
 
-class GoalTracker:
+_EPOCH = datetime(1970, 1, 1)
+_PRIORITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+
+
+@lru_cache(maxsize=4096)
+def _parse_target_date(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _target_date_of(goal: Dict[str, Any]) -> Optional[datetime]:
+    value = goal.get('target_date')
+    return _parse_target_date(value) if isinstance(value, str) else None
+
+
+def _new_id(existing) -> str:
+    while True:
+        candidate = secrets.token_hex(4)
+        if candidate not in existing:
+            return candidate
+
+
+class GoalTracker(LogStore):
+    _collections = ('goals', 'categories')
+    _set_collections = ('categories',)
+    
     def __init__(self, config: dict):
         self.config = config
         self.enabled = config.get('enabled', True)
-        self.storage_path = config.get('storage_path', 'data/goals.json')
+        self._init_store(config, 'goals', save_interval=2.0)
         
         self.goals = {}
         self.categories = set(['Personal', 'Career', 'Health', 'Financial', 'Learning', 'Relationship'])
         
+        self._stats = self._new_stats_bucket()
+        self._stats['high'] = 0
+        self._category_stats = {}
+        self._by_status = {}
+        self._by_category = {}
+        self._by_priority = {}
+        self._completed_counts = {}
+        self._target_ids = []
+        self._target_col = array('d')
+        self._target_slots = {}
+        self._sort_ranks = {}
+        
         if self.enabled:
             self._load_goals()
+            atexit.register(self.flush)
         
         logger.info("GoalTracker initialized")
     
     def _load_goals(self):
         try:
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.goals = data.get('goals', {})
-                    self.categories = set(data.get('categories', list(self.categories)))
+            if self._load_store():
                 logger.info(f"Loaded {len(self.goals)} goals")
+            self._rebuild_indexes()
         except Exception as e:
             logger.error(f"Error loading goals: {e}")
     
-    def _save_goals(self):
+    def _apply_snapshot(self, data: Dict[str, Any]):
+        self.goals = data.get('goals', {})
+        self.categories = set(data.get('categories', list(self.categories)))
+    
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        return {
+            'goals': self.goals,
+            'categories': list(self.categories)
+        }
+    
+    @staticmethod
+    def _new_stats_bucket() -> Dict[str, Any]:
+        return {'total': 0, 'active': 0, 'completed': 0, 'progress': 0.0, 'active_progress': 0.0}
+    
+    def _rebuild_indexes(self):
+        self._stats = self._new_stats_bucket()
+        self._stats['high'] = 0
+        self._category_stats = {}
+        self._by_status = {}
+        self._by_category = {}
+        self._by_priority = {}
+        self._completed_counts = {}
+        self._target_ids = []
+        self._target_col = array('d')
+        self._target_slots = {}
+        self._sort_ranks = {}
+        for goal_id, goal in self.goals.items():
+            self._intern_fields(goal)
+            self._index_goal(goal)
+            self._completed_counts[goal_id] = {
+                kind: sum(1 for item in goal[kind].values() if item['completed'])
+                for kind in ('milestones', 'sub_goals')
+            }
+    
+    @staticmethod
+    def _intern_fields(goal: Dict[str, Any]):
+        for field in ('status', 'priority', 'category'):
+            value = goal.get(field)
+            if isinstance(value, str):
+                goal[field] = sys.intern(value)
+    
+    def _count_goal(self, goal: Dict[str, Any], sign: int):
+        category = goal.get('category', 'Uncategorized')
+        cat_stats = self._category_stats.get(category)
+        if cat_stats is None:
+            cat_stats = self._category_stats[category] = self._new_stats_bucket()
+        
+        status = goal['status']
+        progress = goal['progress']
+        for bucket in (self._stats, cat_stats):
+            bucket['total'] += sign
+            bucket['progress'] += sign * progress
+            if status == 'active':
+                bucket['active'] += sign
+                bucket['active_progress'] += sign * progress
+            elif status == 'completed':
+                bucket['completed'] += sign
+            
+            if bucket['total'] == 0:
+                bucket['progress'] = 0.0
+            if bucket['active'] == 0:
+                bucket['active_progress'] = 0.0
+        
+        if goal['priority'] == 'high':
+            self._stats['high'] += sign
+        
+        if cat_stats['total'] == 0:
+            del self._category_stats[category]
+    
+    def _index_keys(self, goal: Dict[str, Any]):
+        return ((self._by_status, goal['status']),
+                (self._by_category, goal.get('category', 'Uncategorized')),
+                (self._by_priority, goal['priority']))
+    
+    @staticmethod
+    def _target_offset(goal: Dict[str, Any]) -> Optional[float]:
+        if goal['status'] != 'active':
+            return None
+        target = _target_date_of(goal)
+        if target is None or target.tzinfo is not None:
+            return None
+        return (target - _EPOCH).total_seconds()
+    
+    def _index_goal(self, goal: Dict[str, Any]):
+        self._count_goal(goal, 1)
+        for index, key in self._index_keys(goal):
+            index.setdefault(key, set()).add(goal['id'])
+        self._sort_ranks[goal['id']] = (0 if goal['status'] == 'active' else 1,
+                                        _PRIORITY_RANK.get(goal['priority'], 1))
+        
+        offset = self._target_offset(goal)
+        if offset is not None:
+            self._target_slots[goal['id']] = len(self._target_col)
+            self._target_ids.append(goal['id'])
+            self._target_col.append(offset)
+    
+    def _unindex_goal(self, goal: Dict[str, Any]):
+        self._count_goal(goal, -1)
+        for index, key in self._index_keys(goal):
+            ids = index[key]
+            ids.discard(goal['id'])
+            if not ids:
+                del index[key]
+        self._sort_ranks.pop(goal['id'], None)
+        
+        slot = self._target_slots.pop(goal['id'], None)
+        if slot is not None:
+            last_id = self._target_ids.pop()
+            last_offset = self._target_col.pop()
+            if slot < len(self._target_col):
+                self._target_ids[slot] = last_id
+                self._target_col[slot] = last_offset
+                self._target_slots[last_id] = slot
+    
+    @contextmanager
+    def _reindexing(self, goal: Dict[str, Any]):
+        self._unindex_goal(goal)
         try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump({
-                    'goals': self.goals,
-                    'categories': list(self.categories),
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving goals: {e}")
+            yield goal
+        finally:
+            self._index_goal(goal)
     
+    @locked
     def create_goal(self, title: str, description: str = "", category: str = None,
                    target_date: str = None, priority: str = "medium", 
                    measurable: bool = False, target_value: float = None) -> Optional[str]:
@@ -51,33 +205,9 @@ class GoalTracker:
             return None
         
         try:
-            goal_id = str(uuid.uuid4())[:8]
-            
-            if category:
-                self.categories.add(category)
-            
-            self.goals[goal_id] = {
-                'id': goal_id,
-                'title': title,
-                'description': description,
-                'category': category,
-                'priority': priority,
-                'status': 'active',
-                'progress': 0.0,
-                'measurable': measurable,
-                'target_value': target_value,
-                'current_value': 0.0 if measurable else None,
-                'target_date': target_date,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat(),
-                'completed_at': None,
-                'milestones': {},
-                'sub_goals': {},
-                'notes': [],
-                'reflections': []
-            }
-            
-            self._save_goals()
+            goal_id = self._insert_goal(datetime.now().isoformat(), title, description, category,
+                                        target_date, priority, measurable, target_value)
+            self._mark_dirty('goals', goal_id)
             logger.info(f"Created goal: {title}")
             return goal_id
             
@@ -85,50 +215,127 @@ class GoalTracker:
             logger.error(f"Error creating goal: {e}")
             return None
     
+    @locked
+    def create_goals(self, specs: List[Dict[str, Any]]) -> List[Optional[str]]:
+        if not self.enabled:
+            return []
+        
+        now = datetime.now().isoformat()
+        goal_ids = []
+        for spec in specs:
+            try:
+                goal_ids.append(self._insert_goal(now, **spec))
+            except Exception as e:
+                logger.error(f"Error creating goal: {e}")
+                goal_ids.append(None)
+        
+        created = [goal_id for goal_id in goal_ids if goal_id]
+        if created:
+            self._mark_dirty('goals', *created)
+            logger.info(f"Created {len(created)} goals")
+        return goal_ids
+    
+    def _insert_goal(self, now: str, title: str, description: str = "", category: str = None,
+                     target_date: str = None, priority: str = "medium",
+                     measurable: bool = False, target_value: float = None) -> str:
+        goal_id = _new_id(self.goals)
+        
+        if category and category not in self.categories:
+            self.categories.add(category)
+            self._mark_dirty('categories', category)
+        
+        self.goals[goal_id] = {
+            'id': goal_id,
+            'title': title,
+            'description': description,
+            'category': category,
+            'priority': priority,
+            'status': 'active',
+            'progress': 0.0,
+            'measurable': measurable,
+            'target_value': target_value,
+            'current_value': 0.0 if measurable else None,
+            'target_date': target_date,
+            'created_at': now,
+            'updated_at': now,
+            'completed_at': None,
+            'milestones': {},
+            'sub_goals': {},
+            'notes': [],
+            'reflections': []
+        }
+        self._intern_fields(self.goals[goal_id])
+        self._index_goal(self.goals[goal_id])
+        self._completed_counts[goal_id] = {'milestones': 0, 'sub_goals': 0}
+        return goal_id
+    
+    @locked
     def update_progress(self, goal_id: str, progress: float = None, 
-                       current_value: float = None, notes: str = None) -> bool:
+                       current_value: float = None, notes: str = None) -> Union[Mapping[str, Any], bool]:
+        """Return a read-only view of the updated goal, or False on failure."""
         if not self.enabled or goal_id not in self.goals:
             return False
         
         try:
             goal = self.goals[goal_id]
+            if not notes and self._is_noop_update(goal, progress, current_value):
+                return MappingProxyType(goal)
             
-            if progress is not None:
-                goal['progress'] = min(100.0, max(0.0, float(progress)))
-            
-            if current_value is not None and goal['measurable']:
-                goal['current_value'] = float(current_value)
-                if goal['target_value']:
-                    goal['progress'] = min(100.0, (current_value / goal['target_value']) * 100)
-            
-            if notes:
-                goal['notes'].append({
-                    'timestamp': datetime.now().isoformat(),
-                    'note': notes
-                })
-            
-            if goal['progress'] >= 100.0:
-                goal['status'] = 'completed'
-                goal['completed_at'] = datetime.now().isoformat()
+            now = datetime.now().isoformat()
             
-            goal['updated_at'] = datetime.now().isoformat()
-            self._save_goals()
+            with self._reindexing(goal):
+                if progress is not None:
+                    goal['progress'] = min(100.0, max(0.0, float(progress)))
+                
+                if current_value is not None and goal['measurable']:
+                    goal['current_value'] = float(current_value)
+                    if goal['target_value']:
+                        goal['progress'] = min(100.0, (current_value / goal['target_value']) * 100)
+                
+                if notes:
+                    goal['notes'].append({
+                        'timestamp': now,
+                        'note': notes
+                    })
+                
+                if goal['progress'] >= 100.0:
+                    goal['status'] = 'completed'
+                    goal['completed_at'] = now
+                
+                goal['updated_at'] = now
+            self._mark_dirty('goals', goal_id)
             
             logger.info(f"Updated progress for goal {goal_id}: {goal['progress']}%")
-            return self.goals[goal_id].copy()
+            return MappingProxyType(goal)
             
         except Exception as e:
             logger.error(f"Error updating progress: {e}")
             return False
     
+    @staticmethod
+    def _is_noop_update(goal: Dict[str, Any], progress: float, current_value: float) -> bool:
+        if progress is not None and min(100.0, max(0.0, float(progress))) != goal['progress']:
+            return False
+        
+        if current_value is not None and goal['measurable']:
+            if float(current_value) != goal['current_value']:
+                return False
+            if (goal['target_value'] and
+                    min(100.0, (current_value / goal['target_value']) * 100) != goal['progress']):
+                return False
+        
+        return goal['progress'] < 100.0 or goal['status'] == 'completed'
+    
+    @locked
     def add_milestone(self, goal_id: str, milestone_title: str, 
                      description: str = "", target_date: str = None) -> bool:
         if not self.enabled or goal_id not in self.goals:
             return False
         
         try:
-            milestone_id = str(uuid.uuid4())[:8]
             goal = self.goals[goal_id]
+            milestone_id = _new_id(goal['milestones'])
+            now = datetime.now().isoformat()
             
             goal['milestones'][milestone_id] = {
                 'id': milestone_id,
@@ -137,11 +344,11 @@ class GoalTracker:
                 'target_date': target_date,
                 'completed': False,
                 'completed_at': None,
-                'created_at': datetime.now().isoformat()
+                'created_at': now
             }
             
-            goal['updated_at'] = datetime.now().isoformat()
-            self._save_goals()
+            goal['updated_at'] = now
+            self._mark_dirty('goals', goal_id)
             
             logger.info(f"Added milestone to goal {goal_id}: {milestone_title}")
             return True
@@ -150,6 +357,7 @@ class GoalTracker:
             logger.error(f"Error adding milestone: {e}")
             return False
     
+    @locked
     def complete_milestone(self, goal_id: str, milestone_id: str) -> bool:
         if not self.enabled or goal_id not in self.goals:
             return False
@@ -159,22 +367,28 @@ class GoalTracker:
             return False
         
         milestone = goal['milestones'][milestone_id]
+        if milestone['completed']:
+            return True
+        
+        now = datetime.now().isoformat()
+        self._completed_counts[goal_id]['milestones'] += 1
         milestone['completed'] = True
-        milestone['completed_at'] = datetime.now().isoformat()
+        milestone['completed_at'] = now
         
-        self._update_goal_progress_from_milestones(goal_id)
-        self._save_goals()
+        with self._reindexing(goal):
+            self._update_goal_progress_from_milestones(goal_id, now)
+        self._mark_dirty('goals', goal_id)
         
         return True
     
-    def _update_goal_progress_from_milestones(self, goal_id: str):
+    def _update_goal_progress_from_milestones(self, goal_id: str, now: str = None):
         goal = self.goals[goal_id]
         milestones = goal['milestones']
         
         if not milestones:
             return
         
-        completed = sum(1 for m in milestones.values() if m['completed'])
+        completed = self._completed_counts[goal_id]['milestones']
         total = len(milestones)
         
         milestone_progress = (completed / total) * 100 if total > 0 else 0
@@ -184,16 +398,18 @@ class GoalTracker:
             
             if milestone_progress >= 100.0:
                 goal['status'] = 'completed'
-                goal['completed_at'] = datetime.now().isoformat()
+                goal['completed_at'] = now or datetime.now().isoformat()
     
+    @locked
     def add_sub_goal(self, goal_id: str, sub_goal_title: str, 
                      description: str = "") -> Optional[str]:
         if not self.enabled or goal_id not in self.goals:
             return None
         
         try:
-            sub_goal_id = str(uuid.uuid4())[:8]
             goal = self.goals[goal_id]
+            sub_goal_id = _new_id(goal['sub_goals'])
+            now = datetime.now().isoformat()
             
             goal['sub_goals'][sub_goal_id] = {
                 'id': sub_goal_id,
@@ -201,11 +417,11 @@ class GoalTracker:
                 'description': description,
                 'completed': False,
                 'completed_at': None,
-                'created_at': datetime.now().isoformat()
+                'created_at': now
             }
             
-            goal['updated_at'] = datetime.now().isoformat()
-            self._save_goals()
+            goal['updated_at'] = now
+            self._mark_dirty('goals', goal_id)
             
             logger.info(f"Added sub-goal to goal {goal_id}: {sub_goal_title}")
             return sub_goal_id
@@ -214,6 +430,7 @@ class GoalTracker:
             logger.error(f"Error adding sub-goal: {e}")
             return None
     
+    @locked
     def complete_sub_goal(self, goal_id: str, sub_goal_id: str) -> bool:
         if not self.enabled or goal_id not in self.goals:
             return False
@@ -223,22 +440,28 @@ class GoalTracker:
             return False
         
         sub_goal = goal['sub_goals'][sub_goal_id]
+        if sub_goal['completed']:
+            return True
+        
+        now = datetime.now().isoformat()
+        self._completed_counts[goal_id]['sub_goals'] += 1
         sub_goal['completed'] = True
-        sub_goal['completed_at'] = datetime.now().isoformat()
+        sub_goal['completed_at'] = now
         
-        self._update_goal_progress_from_sub_goals(goal_id)
-        self._save_goals()
+        with self._reindexing(goal):
+            self._update_goal_progress_from_sub_goals(goal_id, now)
+        self._mark_dirty('goals', goal_id)
         
         return True
     
-    def _update_goal_progress_from_sub_goals(self, goal_id: str):
+    def _update_goal_progress_from_sub_goals(self, goal_id: str, now: str = None):
         goal = self.goals[goal_id]
         sub_goals = goal['sub_goals']
         
         if not sub_goals:
             return
         
-        completed = sum(1 for sg in sub_goals.values() if sg['completed'])
+        completed = self._completed_counts[goal_id]['sub_goals']
         total = len(sub_goals)
         
         sub_goal_progress = (completed / total) * 100 if total > 0 else 0
@@ -248,11 +471,14 @@ class GoalTracker:
             
             if sub_goal_progress >= 100.0:
                 goal['status'] = 'completed'
-                goal['completed_at'] = datetime.now().isoformat()
+                goal['completed_at'] = now or datetime.now().isoformat()
     
+    @locked
     def add_reflection(self, goal_id: str, reflection: str) -> bool:
         if not self.enabled or goal_id not in self.goals:
             return False
+        if not reflection:
+            return True
         
         goal = self.goals[goal_id]
         goal['reflections'].append({
@@ -260,32 +486,36 @@ class GoalTracker:
             'reflection': reflection
         })
         
-        self._save_goals()
+        self._mark_dirty('goals', goal_id)
         return True
     
-    def get_goal(self, goal_id: str) -> Optional[Dict[str, Any]]:
-        if not self.enabled:
+    def get_goal(self, goal_id: str) -> Optional[Mapping[str, Any]]:
+        if not self.enabled or goal_id not in self.goals:
             return None
         
-        return self.goals.get(goal_id)
+        return MappingProxyType(self.goals[goal_id])
     
     def list_goals(self, status: str = None, category: str = None, 
                   priority: str = None) -> List[Dict[str, Any]]:
         if not self.enabled:
             return []
         
+        selected = [index.get(key, set()) for index, key in (
+            (self._by_status, status),
+            (self._by_category, category),
+            (self._by_priority, priority)
+        ) if key]
+        
+        if selected:
+            selected.sort(key=len)
+            goal_ids = selected[0].intersection(*selected[1:])
+        else:
+            goal_ids = self.goals
+        
         goals_list = []
         
-        for goal_id, goal in self.goals.items():
-            if status and goal['status'] != status:
-                continue
-            
-            if category and goal.get('category') != category:
-                continue
-            
-            if priority and goal['priority'] != priority:
-                continue
-            
+        for goal_id in goal_ids:
+            goal = self.goals[goal_id]
             goals_list.append({
                 'id': goal['id'],
                 'title': goal['title'],
@@ -297,11 +527,8 @@ class GoalTracker:
                 'updated_at': goal['updated_at']
             })
         
-        goals_list.sort(key=lambda x: (
-            0 if x['status'] == 'active' else 1,
-            {'high': 0, 'medium': 1, 'low': 2}.get(x['priority'], 1),
-            x['updated_at']
-        ), reverse=True)
+        ranks = self._sort_ranks
+        goals_list.sort(key=lambda x: (ranks[x['id']], x['updated_at']), reverse=True)
         
         return goals_list
     
@@ -311,17 +538,13 @@ class GoalTracker:
         
         goal = self.goals[goal_id]
         
-        milestones_completed = sum(1 for m in goal['milestones'].values() if m['completed'])
-        sub_goals_completed = sum(1 for sg in goal['sub_goals'].values() if sg['completed'])
+        milestones_completed = self._completed_counts[goal_id]['milestones']
+        sub_goals_completed = self._completed_counts[goal_id]['sub_goals']
         
         days_active = None
-        if goal.get('target_date'):
-            try:
-                target = datetime.fromisoformat(goal['target_date'])
-                days_remaining = (target.date() - datetime.now().date()).days
-                days_active = days_remaining
-            except:
-                pass
+        target = _target_date_of(goal)
+        if target is not None:
+            days_active = (target.date() - date.today()).days
         
         return {
             'id': goal['id'],
@@ -347,38 +570,44 @@ class GoalTracker:
             'completed_at': goal.get('completed_at')
         }
     
+    @locked
     def archive_goal(self, goal_id: str) -> bool:
         if not self.enabled or goal_id not in self.goals:
             return False
         
-        self.goals[goal_id]['status'] = 'archived'
-        self._save_goals()
+        goal = self.goals[goal_id]
+        if goal['status'] == 'archived':
+            return True
+        
+        with self._reindexing(goal):
+            goal['status'] = 'archived'
+        self._mark_dirty('goals', goal_id, fields=['status'])
         return True
     
-    def delete_goal(self, goal_id: str) -> bool:
+    @locked
+    def delete_goal(self, goal_id: str, sync: bool = False) -> bool:
         if not self.enabled or goal_id not in self.goals:
             return False
         
-        del self.goals[goal_id]
-        self._save_goals()
+        self._unindex_goal(self.goals.pop(goal_id))
+        self._completed_counts.pop(goal_id, None)
+        self._mark_dirty('goals', goal_id)
+        if sync:
+            self.flush()
         return True
     
     def get_category_summary(self, category: str = None) -> Dict[str, Any]:
         if not self.enabled:
             return {'enabled': False}
         
-        if category:
-            goals = [g for g in self.goals.values() if g.get('category') == category]
-        else:
-            goals = list(self.goals.values())
-        
-        if not goals:
+        stats = self._category_stats.get(category) if category else self._stats
+        if not stats or not stats['total']:
             return {'goals': 0}
         
-        total = len(goals)
-        active = sum(1 for g in goals if g['status'] == 'active')
-        completed = sum(1 for g in goals if g['status'] == 'completed')
-        avg_progress = sum(g['progress'] for g in goals) / total if total > 0 else 0
+        total = stats['total']
+        active = stats['active']
+        completed = stats['completed']
+        avg_progress = stats['progress'] / total
         
         return {
             'category': category or 'All',
@@ -393,33 +622,20 @@ class GoalTracker:
         if not self.enabled:
             return {'enabled': False}
         
-        total_goals = len(self.goals)
-        active_goals = sum(1 for g in self.goals.values() if g['status'] == 'active')
-        completed_goals = sum(1 for g in self.goals.values() if g['status'] == 'completed')
-        
-        high_priority = sum(1 for g in self.goals.values() if g['priority'] == 'high')
-        
-        total_progress = sum(g['progress'] for g in self.goals.values() if g['status'] == 'active')
-        avg_progress = total_progress / active_goals if active_goals > 0 else 0
-        
-        overdue_goals = 0
-        for goal in self.goals.values():
-            if goal['status'] == 'active' and goal.get('target_date'):
-                try:
-                    target = datetime.fromisoformat(goal['target_date'])
-                    if datetime.now() > target:
-                        overdue_goals += 1
-                except:
-                    pass
-        
-        category_breakdown = {}
-        for goal in self.goals.values():
-            cat = goal.get('category', 'Uncategorized')
-            if cat not in category_breakdown:
-                category_breakdown[cat] = {'total': 0, 'completed': 0}
-            category_breakdown[cat]['total'] += 1
-            if goal['status'] == 'completed':
-                category_breakdown[cat]['completed'] += 1
+        stats = self._stats
+        total_goals = stats['total']
+        active_goals = stats['active']
+        completed_goals = stats['completed']
+        high_priority = stats['high']
+        avg_progress = stats['active_progress'] / active_goals if active_goals > 0 else 0
+        
+        now = (datetime.now() - _EPOCH).total_seconds()
+        overdue_goals = sum(1 for offset in self._target_col if offset < now)
+        
+        category_breakdown = {
+            cat: {'total': cat_stats['total'], 'completed': cat_stats['completed']}
+            for cat, cat_stats in self._category_stats.items()
+        }
         
         return {
             'enabled': True,
@@ -439,26 +655,13 @@ class GoalTracker:
         return self.get_analytics()
 
     
-    def get_all_goals(self) -> List[Dict[str, Any]]:
-        goals_list = []
-        for goal_id, goal in self.goals.items():
-            goal_copy = goal.copy()
-            goal_copy['id'] = goal_id
-            goals_list.append(goal_copy)
-        return goals_list
+    def get_all_goals(self) -> List[Mapping[str, Any]]:
+        return [MappingProxyType(goal) for goal in self.goals.values()]
     
     def add_goal(self, title: str, description: str = "", target_date: str = None, **kwargs):
         goal_id = self.create_goal(title, description, target_date, **kwargs)
         if goal_id:
-            return self.goals[goal_id].copy()
+            return MappingProxyType(self.goals[goal_id])
         return None
-
-    def remove_goal(self, goal_id: str) -> bool:
-        if not self.enabled or goal_id not in self.goals:
-            return False
-        try:
-            del self.goals[goal_id]
-            self._save_goals()
-            return True
-        except:
-            return False
+    
+    remove_goal = delete_goal
@@ -1,61 +1,187 @@
 import logging
-import json
 import os
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+import sys
+import atexit
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Any, List, Optional, Set
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+
+from ..tracker_base import LogStore, locked, memoized
 
 logger = logging.getLogger(__name__)
 
-class HabitTracker:
+
+# Completions are stored per habit as parallel columns, ordered by date
+_COLUMNS = ('timestamp', 'notes', 'date')
+
+
+def _empty_columns() -> Dict[str, list]:
+    return {column: [] for column in _COLUMNS}
+
+
+def _as_columns(completions) -> Dict[str, list]:
+    if isinstance(completions, list):
+        # Legacy layout: one dict per completion
+        completions = {column: [c.get(column) for c in completions] for column in _COLUMNS}
+    # Completions on the same day share one interned date string
+    dates = completions['date'] = [sys.intern(d) for d in completions['date']]
+    if any(a > b for a, b in zip(dates, dates[1:])):
+        order = sorted(range(len(dates)), key=dates.__getitem__)
+        completions = {column: [completions[column][i] for i in order] for column in _COLUMNS}
+    return completions
+
+
+# Lowercases ASCII letters and maps spaces to underscores in one pass
+_SLUG_TABLE = str.maketrans({**{chr(c): chr(c + 32) for c in range(ord('A'), ord('Z') + 1)}, ' ': '_'})
+
+
+class HabitTracker(LogStore):
     def __init__(self, config: dict):
         self.config = config
         self.enabled = config.get('enabled', True)
-        self.storage_path = config.get('storage_path', 'data/habits.json')
+        self._init_store(config, 'habits', save_interval=2.0)
         self.reminder_enabled = config.get('reminder_enabled', True)
         
         self.habits = {}
-        self.completions = defaultdict(list)
+        self.completions: Dict[str, Dict[str, list]] = {}
+        self._name_index: Dict[str, str] = {}
+        # Active habit ids, kept in the same order as self.habits
+        self._active_ids: Dict[str, None] = {}
+        # Length of the run of consecutive days ending at each habit's latest date
+        self._runs: Dict[str, int] = {}
+        self._today: Optional[str] = None
+        self._completed_today: Set[str] = set()
+        # Completions per day across active habits, with the days kept sorted
+        self._day_counts: Dict[str, int] = {}
+        self._days: List[str] = []
+        self._read_cache: Dict[tuple, Dict[str, Any]] = {}
         
         if self.enabled:
+            os.makedirs(os.path.dirname(self.storage_path) or '.', exist_ok=True)
             self._load_habits()
+            atexit.register(self.flush)
         
         logger.info("HabitTracker initialized")
     
     def _load_habits(self):
         try:
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.habits = data.get('habits', {})
-                    self.completions = defaultdict(list, data.get('completions', {}))
+            if self._load_store():
+                self._rebuild_indexes()
                 logger.info(f"Loaded {len(self.habits)} habits")
         except Exception as e:
             logger.error(f"Error loading habits: {e}")
     
-    def _save_habits(self):
-        try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump({
-                    'habits': self.habits,
-                    'completions': dict(self.completions),
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving habits: {e}")
+    def _apply_snapshot(self, data: Dict[str, Any]):
+        self.habits = data.get('habits', {})
+        self.completions = {
+            habit_id: _as_columns(completions)
+            for habit_id, completions in data.get('completions', {}).items()
+        }
+        self._log_seq = data.get('log_seq', 0)
+    
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        return {
+            'habits': self.habits,
+            'completions': self.completions,
+            'log_seq': self._log_seq
+        }
+    
+    def _before_replay(self):
+        for habit_id in self.habits:
+            self.completions.setdefault(habit_id, _empty_columns())
+    
+    def _apply_event(self, record: Dict[str, Any]):
+        # Completions are the only events; streaks are rebuilt after replay
+        habit_id = record['h']
+        if habit_id in self.habits:
+            self._insert_completion(habit_id, record['t'], record['n'])
+            self.habits[habit_id]['total_completions'] += 1
+    
+    def _rebuild_indexes(self):
+        self._name_index = {}
+        self._runs = {}
+        self._day_counts = {}
+        self._days = []
+        self._read_cache = {}
+        for habit_id, habit in self.habits.items():
+            self._index_habit(habit_id)
+            self._update_streaks(habit_id)
+            if habit['active']:
+                self._tally_days(habit_id, 1)
+        self._rebuild_active_ids()
+        self._today = None
+    
+    def _rebuild_active_ids(self):
+        self._active_ids = {habit_id: None for habit_id, habit in self.habits.items() if habit['active']}
+    
+    def _index_habit(self, habit_id: str):
+        # setdefault keeps the first match, as the old linear scan did
+        self._name_index.setdefault(self.habits[habit_id]['name'].lower(), habit_id)
+        self._name_index.setdefault(habit_id, habit_id)
+    
+    def _unindex_habit(self, habit_id: str):
+        for key in (self.habits[habit_id]['name'].lower(), habit_id):
+            if self._name_index.get(key) == habit_id:
+                del self._name_index[key]
+    
+    def _completed_on(self, today: str) -> Set[str]:
+        """Ids of habits with a completion on ``today``; rebuilt once per day."""
+        if today != self._today:
+            self._today = today
+            self._completed_today = set()
+            for habit_id in self.habits:
+                dates = self.completions[habit_id]['date']
+                if bisect_right(dates, today) > bisect_left(dates, today):
+                    self._completed_today.add(habit_id)
+        return self._completed_today
+    
+    def _tally_days(self, habit_id: str, sign: int):
+        for day in self.completions[habit_id]['date']:
+            self._tally_day(day, sign)
+    
+    def _tally_day(self, day: str, sign: int):
+        count = self._day_counts.get(day, 0) + sign
+        if count:
+            if day not in self._day_counts:
+                insort(self._days, day)
+            self._day_counts[day] = count
+        else:
+            del self._day_counts[day]
+            del self._days[bisect_left(self._days, day)]
+    
+    @staticmethod
+    def _count_since(dates: List[str], cutoff: str) -> int:
+        return len(dates) - bisect_left(dates, cutoff)
+    
+    def _log_event(self, record: Dict[str, Any]):
+        with self._save_lock:
+            self._read_cache.clear()
+            super()._log_event(record)
+    
+    def _mark_snapshot(self):
+        """Anything but a completion is saved by rewriting the snapshot."""
+        with self._save_lock:
+            self._read_cache.clear()
+            super()._mark_snapshot()
     
     def create_habit(self, name: str, description: str = "", frequency: str = "daily", 
                      target_count: int = 1, category: str = None, reminder_time: str = None) -> bool:
+        return self._create_habit(name, description, frequency, target_count, category, reminder_time) is not None
+    
+    @locked
+    def _create_habit(self, name: str, description: str = "", frequency: str = "daily",
+                      target_count: int = 1, category: str = None, reminder_time: str = None) -> Optional[str]:
         if not self.enabled:
-            return False
+            return None
         
         try:
             habit_id = self._generate_habit_id(name)
             
             if habit_id in self.habits:
                 logger.warning(f"Habit '{name}' already exists")
-                return False
+                return None
             
             self.habits[habit_id] = {
                 'id': habit_id,
@@ -72,16 +198,21 @@ class HabitTracker:
                 'total_completions': 0
             }
             
-            self.completions[habit_id] = []
-            self._save_habits()
+            self.completions[habit_id] = _empty_columns()
+            self._runs[habit_id] = 0
+            self._completed_today.discard(habit_id)
+            self._index_habit(habit_id)
+            self._active_ids[habit_id] = None
+            self._mark_snapshot()
             
             logger.info(f"Created habit: {name}")
-            return True
+            return habit_id
             
         except Exception as e:
             logger.error(f"Error creating habit: {e}")
-            return False
+            return None
     
+    @locked
     def log_completion(self, habit_name: str, notes: str = None, timestamp: str = None) -> bool:
         if not self.enabled:
             return False
@@ -99,18 +230,23 @@ class HabitTracker:
                 return False
             
             completion_time = timestamp or datetime.now().isoformat()
+            completion_date = completion_time[:10]
             
-            completion = {
-                'timestamp': completion_time,
-                'notes': notes,
-                'date': completion_time[:10]
-            }
-            
-            self.completions[habit_id].append(completion)
+            # The save lock is held from the insert to the seq bump; a compaction in
+            # between would snapshot the completion under the old log_seq and
+            # replay would apply it twice
+            index = self._insert_completion(habit_id, completion_time, notes)
+            if completion_date == self._today:
+                self._completed_today.add(habit_id)
+            self._tally_day(completion_date, 1)
             
             habit['total_completions'] += 1
-            self._update_streaks(habit_id)
-            self._save_habits()
+            if index == len(self.completions[habit_id]['date']) - 1:
+                self._extend_streak(habit_id)
+            else:
+                self._update_streaks(habit_id)
+            
+            self._log_event({'h': habit_id, 't': completion_time, 'n': notes})
             
             logger.info(f"Logged completion for habit: {habit_name}")
             return True
@@ -119,45 +255,56 @@ class HabitTracker:
             logger.error(f"Error logging completion: {e}")
             return False
     
+    def _insert_completion(self, habit_id: str, completion_time: str, notes: Optional[str]) -> int:
+        # Backdated timestamps are inserted in date order
+        completions = self.completions[habit_id]
+        completion_date = sys.intern(completion_time[:10])
+        index = bisect_right(completions['date'], completion_date)
+        completions['date'].insert(index, completion_date)
+        completions['timestamp'].insert(index, completion_time)
+        completions['notes'].insert(index, notes)
+        return index
+    
     def _update_streaks(self, habit_id: str):
+        """Recompute both streaks from the full date list (load, backdated inserts)."""
         habit = self.habits[habit_id]
-        completions = self.completions[habit_id]
-        
-        if not completions:
-            habit['current_streak'] = 0
-            return
+        run = 0
+        longest = 0
+        previous = None
+        previous_ordinal = 0
         
-        completion_dates = sorted(set(c['date'] for c in completions), reverse=True)
-        
-        today = datetime.now().date()
-        yesterday = today - timedelta(days=1)
-        
-        current_streak = 0
-        longest_streak = 0
-        temp_streak = 0
+        for date_str in self.completions[habit_id]['date']:
+            if date_str == previous:
+                continue
+            ordinal = date.fromisoformat(date_str).toordinal()
+            run = run + 1 if ordinal - previous_ordinal == 1 else 1
+            longest = max(longest, run)
+            previous = date_str
+            previous_ordinal = ordinal
+        
+        self._runs[habit_id] = run
+        habit['longest_streak'] = longest
+        self._refresh_current_streak(habit_id)
+    
+    def _extend_streak(self, habit_id: str):
+        """Account for a completion appended at the newest end of the date list."""
+        habit = self.habits[habit_id]
+        dates = self.completions[habit_id]['date']
         
-        expected_date = today
-        for date_str in completion_dates:
-            date = datetime.fromisoformat(date_str).date()
-            
-            if date == expected_date or date == expected_date - timedelta(days=1):
-                temp_streak += 1
-                longest_streak = max(longest_streak, temp_streak)
-                expected_date = date - timedelta(days=1)
-            else:
-                if current_streak == 0:
-                    current_streak = temp_streak
-                temp_streak = 1
-                expected_date = date - timedelta(days=1)
-        
-        if completion_dates:
-            latest_date = datetime.fromisoformat(completion_dates[0]).date()
-            if latest_date == today or latest_date == yesterday:
-                habit['current_streak'] = temp_streak
-            else:
-                habit['current_streak'] = 0
+        if len(dates) < 2:
+            self._runs[habit_id] = 1
+        elif dates[-1] != dates[-2]:
+            gap = date.fromisoformat(dates[-1]).toordinal() - date.fromisoformat(dates[-2]).toordinal()
+            self._runs[habit_id] = self._runs[habit_id] + 1 if gap == 1 else 1
         
-        habit['longest_streak'] = longest_streak
+        habit['longest_streak'] = max(habit['longest_streak'], self._runs[habit_id])
+        self._refresh_current_streak(habit_id)
+    
+    def _refresh_current_streak(self, habit_id: str):
+        # A streak stays current while its latest day is today or yesterday
+        dates = self.completions[habit_id]['date']
+        gap = date.today().toordinal() - date.fromisoformat(dates[-1]).toordinal() if dates else -1
+        self.habits[habit_id]['current_streak'] = self._runs[habit_id] if gap in (0, 1) else 0
     
     def get_habit_status(self, habit_name: str) -> Optional[Dict[str, Any]]:
         if not self.enabled:
@@ -168,16 +315,17 @@ class HabitTracker:
             return None
         
         habit = self.habits[habit_id]
-        completions = self.completions[habit_id]
+        dates = self.completions[habit_id]['date']
         
-        today = datetime.now().date().isoformat()
-        completed_today = any(c['date'] == today for c in completions)
+        now = datetime.now()
+        today = now.date().isoformat()
+        completed_today = habit_id in self._completed_on(today)
         
-        week_ago = (datetime.now() - timedelta(days=7)).date().isoformat()
-        completions_this_week = sum(1 for c in completions if c['date'] >= week_ago)
+        week_ago = (now - timedelta(days=7)).date().isoformat()
+        completions_this_week = self._count_since(dates, week_ago)
         
-        month_ago = (datetime.now() - timedelta(days=30)).date().isoformat()
-        completions_this_month = sum(1 for c in completions if c['date'] >= month_ago)
+        month_ago = (now - timedelta(days=30)).date().isoformat()
+        completions_this_month = self._count_since(dates, month_ago)
         
         return {
             'name': habit['name'],
@@ -194,33 +342,32 @@ class HabitTracker:
             'created_at': habit['created_at']
         }
     
-    def list_habits(self, category: str = None, active_only: bool = True) -> List[Dict[str, Any]]:
+    def list_habits(self, category: str = None, active_only: bool = True,
+                    top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         if not self.enabled:
             return []
         
         habits_list = []
-        today = datetime.now().date().isoformat()
+        completed = self._completed_on(datetime.now().date().isoformat())
         
-        for habit_id, habit in self.habits.items():
-            if active_only and not habit['active']:
-                continue
-            
+        for habit_id in (self._active_ids if active_only else self.habits):
+            habit = self.habits[habit_id]
             if category and habit.get('category') != category:
                 continue
             
-            completions = self.completions[habit_id]
-            completed_today = any(c['date'] == today for c in completions)
-            
             habits_list.append({
                 'name': habit['name'],
                 'category': habit.get('category'),
                 'current_streak': habit['current_streak'],
-                'completed_today': completed_today,
+                'completed_today': habit_id in completed,
                 'frequency': habit['frequency']
             })
         
-        return sorted(habits_list, key=lambda x: x['current_streak'], reverse=True)
+        if top_k is not None:
+            return heapq.nlargest(top_k, habits_list, key=itemgetter('current_streak'))
+        return sorted(habits_list, key=itemgetter('current_streak'), reverse=True)
     
+    @memoized
     def get_analytics(self, habit_name: str = None, days: int = 30) -> Dict[str, Any]:
         if not self.enabled:
             return {'enabled': False}
@@ -236,57 +383,55 @@ class HabitTracker:
     
     def _get_habit_analytics(self, habit_id: str, days: int) -> Dict[str, Any]:
         habit = self.habits[habit_id]
-        completions = self.completions[habit_id]
+        dates = self.completions[habit_id]['date']
         
         cutoff_date = (datetime.now() - timedelta(days=days)).date().isoformat()
-        recent_completions = [c for c in completions if c['date'] >= cutoff_date]
+        start = bisect_left(dates, cutoff_date)
+        total = len(dates) - start
         
-        completion_rate = (len(recent_completions) / days) * 100 if days > 0 else 0
+        completion_rate = (total / days) * 100 if days > 0 else 0
         
-        completions_by_date = defaultdict(int)
-        for c in recent_completions:
-            completions_by_date[c['date']] += 1
-        
-        best_day = max(completions_by_date.items(), key=lambda x: x[1]) if completions_by_date else (None, 0)
+        # Dates are sorted, so each day's count is the width of its run
+        best_day = (None, 0)
+        index = start
+        while index < len(dates):
+            end = bisect_right(dates, dates[index], index)
+            if end - index > best_day[1]:
+                best_day = (dates[index], end - index)
+            index = end
         
         return {
             'habit_name': habit['name'],
             'days_analyzed': days,
-            'total_completions': len(recent_completions),
+            'total_completions': total,
             'completion_rate': round(completion_rate, 1),
             'current_streak': habit['current_streak'],
             'longest_streak': habit['longest_streak'],
             'best_day': best_day[0],
             'best_day_count': best_day[1],
-            'average_per_day': round(len(recent_completions) / days, 2) if days > 0 else 0
+            'average_per_day': round(total / days, 2) if days > 0 else 0
         }
     
     def _get_overall_analytics(self, days: int) -> Dict[str, Any]:
-        total_habits = len([h for h in self.habits.values() if h['active']])
+        total_habits = len(self._active_ids)
         
-        cutoff_date = (datetime.now() - timedelta(days=days)).date().isoformat()
+        now = datetime.now()
+        cutoff_date = (now - timedelta(days=days)).date().isoformat()
         
-        total_completions = 0
+        total_completions = sum(
+            self._day_counts[day] for day in self._days[bisect_left(self._days, cutoff_date):]
+        )
         habits_with_streaks = 0
         max_streak = 0
         
-        for habit_id, habit in self.habits.items():
-            if not habit['active']:
-                continue
-            
-            recent_completions = [c for c in self.completions[habit_id] if c['date'] >= cutoff_date]
-            total_completions += len(recent_completions)
-            
+        for habit_id in self._active_ids:
+            habit = self.habits[habit_id]
             if habit['current_streak'] > 0:
                 habits_with_streaks += 1
             
             max_streak = max(max_streak, habit['current_streak'])
         
-        today = datetime.now().date().isoformat()
-        habits_completed_today = sum(
-            1 for habit_id in self.habits.keys()
-            if any(c['date'] == today for c in self.completions[habit_id])
-        )
+        habits_completed_today = len(self._completed_on(now.date().isoformat()))
         
         return {
             'enabled': True,
@@ -299,6 +444,7 @@ class HabitTracker:
             'average_completions_per_day': round(total_completions / days, 1) if days > 0 else 0
         }
     
+    @locked
     def archive_habit(self, habit_name: str) -> bool:
         if not self.enabled:
             return False
@@ -307,11 +453,15 @@ class HabitTracker:
         if not habit_id:
             return False
         
+        if self.habits[habit_id]['active']:
+            self._tally_days(habit_id, -1)
+            del self._active_ids[habit_id]
         self.habits[habit_id]['active'] = False
-        self._save_habits()
+        self._mark_snapshot()
         logger.info(f"Archived habit: {habit_name}")
         return True
     
+    @locked
     def activate_habit(self, habit_name: str) -> bool:
         if not self.enabled:
             return False
@@ -320,44 +470,30 @@ class HabitTracker:
         if not habit_id:
             return False
         
-        self.habits[habit_id]['active'] = True
-        self._save_habits()
+        if not self.habits[habit_id]['active']:
+            self._tally_days(habit_id, 1)
+            self.habits[habit_id]['active'] = True
+            self._rebuild_active_ids()
+        self._mark_snapshot()
         logger.info(f"Activated habit: {habit_name}")
         return True
     
-    def delete_habit(self, habit_name: str) -> bool:
-        if not self.enabled:
-            return False
-        
-        habit_id = self._find_habit_id(habit_name)
-        if not habit_id:
-            return False
-        
-        del self.habits[habit_id]
-        if habit_id in self.completions:
-            del self.completions[habit_id]
-        
-        self._save_habits()
-        logger.info(f"Deleted habit: {habit_name}")
-        return True
-    
+    @memoized
     def get_today_summary(self) -> Dict[str, Any]:
         if not self.enabled:
             return {'enabled': False}
         
         today = datetime.now().date().isoformat()
         
-        active_habits = [h for h in self.habits.values() if h['active']]
+        active_habits = [self.habits[habit_id] for habit_id in self._active_ids]
         total_habits = len(active_habits)
         
         completed_today = []
         pending_today = []
+        completed = self._completed_on(today)
         
         for habit in active_habits:
-            habit_id = habit['id']
-            is_completed = any(c['date'] == today for c in self.completions[habit_id])
-            
-            if is_completed:
+            if habit['id'] in completed:
                 completed_today.append(habit['name'])
             else:
                 pending_today.append(habit['name'])
@@ -384,34 +520,35 @@ class HabitTracker:
             return []
         
         cutoff_date = (datetime.now() - timedelta(days=days)).date().isoformat()
+        completions = self.completions[habit_id]
+        start = bisect_left(completions['date'], cutoff_date)
         recent_completions = [
-            c for c in self.completions[habit_id]
-            if c['date'] >= cutoff_date
+            dict(zip(_COLUMNS, row))
+            for row in zip(*(completions[column][start:] for column in _COLUMNS))
         ]
         
         return sorted(recent_completions, key=lambda x: x['timestamp'], reverse=True)
     
     def _generate_habit_id(self, name: str) -> str:
+        if name.isascii():
+            return name.translate(_SLUG_TABLE)
         return name.lower().replace(' ', '_')
     
     def _find_habit_id(self, name: str) -> Optional[str]:
-        name_lower = name.lower()
-        for habit_id, habit in self.habits.items():
-            if habit['name'].lower() == name_lower or habit_id == name_lower:
-                return habit_id
-        return None
+        return self._name_index.get(name.lower())
     
+    @memoized
     def get_stats(self) -> Dict[str, Any]:
         if not self.enabled:
             return {'enabled': False}
         
-        active_habits = sum(1 for h in self.habits.values() if h['active'])
+        active_habits = len(self._active_ids)
         total_completions = sum(h['total_completions'] for h in self.habits.values())
         
-        habits_with_streaks = sum(1 for h in self.habits.values() 
-                                 if h['active'] and h['current_streak'] > 0)
+        active_streaks = [self.habits[habit_id]['current_streak'] for habit_id in self._active_ids]
+        habits_with_streaks = sum(1 for streak in active_streaks if streak > 0)
         
-        avg_streak = sum(h['current_streak'] for h in self.habits.values() if h['active']) / active_habits if active_habits > 0 else 0
+        avg_streak = sum(active_streaks) / active_habits if active_habits > 0 else 0
         
         return {
             'enabled': True,
@@ -423,11 +560,8 @@ class HabitTracker:
         }
     
     def add_habit(self, name: str, frequency: str = "daily", **kwargs) -> Optional[Dict[str, Any]]:
-        success = self.create_habit(name, frequency=frequency, **kwargs)
-        if success:
-            habit_id = self._find_habit_id(name)
-            return self.habits.get(habit_id)
-        return None
+        habit_id = self._create_habit(name, frequency=frequency, **kwargs)
+        return self.habits[habit_id] if habit_id is not None else None
     
     def get_all_habits(self) -> List[Dict[str, Any]]:
         return self.list_habits(active_only=False)
@@ -438,20 +572,24 @@ class HabitTracker:
             return self.log_completion(habit['name'])
         return False
     
-    def delete_habit(self, habit_id: str) -> bool:
-        return self.remove_habit(habit_id)
-
-
-
+    @locked
     def remove_habit(self, habit_id: str) -> bool:
         if not self.enabled or habit_id not in self.habits:
             return False
         try:
+            self._unindex_habit(habit_id)
+            if self.habits[habit_id]['active']:
+                self._tally_days(habit_id, -1)
+                del self._active_ids[habit_id]
+            self._completed_today.discard(habit_id)
+            self._runs.pop(habit_id, None)
             del self.habits[habit_id]
-            del self.completions[habit_id]
-            self._save_habits()
+            self.completions.pop(habit_id, None)
+            self._mark_snapshot()
             logger.info(f"Removed habit: {habit_id}")
             return True
         except Exception as e:
             logger.error(f"Error removing habit: {e}")
             return False
+    
+    delete_habit = remove_habit
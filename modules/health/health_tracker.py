@@ -1,18 +1,89 @@
 import logging
-import json
 import os
+import atexit
+from bisect import bisect_left, insort
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
-import uuid
+from collections import Counter
+import secrets
+
+from ..tracker_base import LogStore, clamp_rating, disable_methods, locked, safe
 
 logger = logging.getLogger(__name__)
 
-class HealthTracker:
+
+# What each gated method returns while the tracker is disabled; callables
+# are called so every caller gets a fresh object
+_DISABLED_RESULTS = {
+    'log_workout': None,
+    'log_measurement': None,
+    'log_sleep': None,
+    'log_water': False,
+    'log_mood': None,
+    'set_health_goal': None,
+    'get_workout_summary': None,
+    'get_sleep_summary': None,
+    'get_today_water': None,
+    'get_measurement_history': list,
+    'get_mood_analytics': None,
+}
+
+
+def _workout_day() -> Dict[str, Any]:
+    return {'count': 0, 'duration': 0, 'calories': 0, 'distance': 0, 'types': Counter()}
+
+
+def _add_workout(day: Dict[str, Any], workout: Dict[str, Any]):
+    day['count'] += 1
+    day['duration'] += workout['duration']
+    if workout.get('calories'):
+        day['calories'] += workout['calories']
+    if workout.get('distance'):
+        day['distance'] += workout['distance']
+    day['types'][workout['type']] += 1
+
+
+def _sleep_day() -> Dict[str, Any]:
+    return {'count': 0, 'hours': 0, 'quality': Counter()}
+
+
+def _add_sleep(day: Dict[str, Any], sleep: Dict[str, Any]):
+    day['count'] += 1
+    day['hours'] += sleep['hours']
+    if sleep.get('quality'):
+        day['quality'][sleep['quality']] += 1
+
+
+def _mood_day() -> Dict[str, Any]:
+    return {'count': 0, 'rating_total': 0, 'min_rating': None, 'max_rating': None, 'moods': Counter()}
+
+
+def _add_mood(day: Dict[str, Any], mood: Dict[str, Any]):
+    rating = mood['rating']
+    day['count'] += 1
+    day['rating_total'] += rating
+    if day['min_rating'] is None or rating < day['min_rating']:
+        day['min_rating'] = rating
+    if day['max_rating'] is None or rating > day['max_rating']:
+        day['max_rating'] = rating
+    day['moods'][mood['mood']] += 1
+
+
+# Windowed collections and how one day of each is summarised
+_BY_DAY = {
+    'workouts': (_workout_day, _add_workout),
+    'sleep_logs': (_sleep_day, _add_sleep),
+    'mood_logs': (_mood_day, _add_mood),
+}
+
+
+class HealthTracker(LogStore):
+    _collections = ('workouts', 'measurements', 'sleep_logs', 'water_intake', 'mood_logs', 'goals')
+    
     def __init__(self, config: dict):
         self.config = config
         self.enabled = config.get('enabled', True)
-        self.storage_path = config.get('storage_path', 'data/health.json')
+        self._init_store(config, 'health', save_interval=2.0)
         
         self.workouts = {}
         self.measurements = {}
@@ -21,318 +92,324 @@ class HealthTracker:
         self.mood_logs = {}
         self.goals = {}
         
+        # Ids of each windowed collection grouped by day, its days in sorted
+        # order, and a running summary of each day
+        self._by_day: Dict[str, Dict[str, List[str]]] = {c: {} for c in _BY_DAY}
+        self._days: Dict[str, List[str]] = {c: [] for c in _BY_DAY}
+        self._daily: Dict[str, Dict[str, Dict[str, Any]]] = {c: {} for c in _BY_DAY}
+        # Per measurement type, parallel date/id columns sorted by date
+        self._measurements_by_type: Dict[str, Dict[str, List[str]]] = {}
+        
         if self.enabled:
+            os.makedirs(os.path.dirname(self.storage_path) or '.', exist_ok=True)
             self._load_data()
+            atexit.register(self.flush)
+        else:
+            disable_methods(self, _DISABLED_RESULTS)
         
         logger.info("HealthTracker initialized")
     
     def _load_data(self):
         try:
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.workouts = data.get('workouts', {})
-                    self.measurements = data.get('measurements', {})
-                    self.sleep_logs = data.get('sleep_logs', {})
-                    self.water_intake = data.get('water_intake', {})
-                    self.mood_logs = data.get('mood_logs', {})
-                    self.goals = data.get('goals', {})
+            if self._load_store():
                 logger.info(f"Loaded health data")
+            self._rebuild_indexes()
         except Exception as e:
             logger.error(f"Error loading health data: {e}")
     
-    def _save_data(self):
-        try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump({
-                    'workouts': self.workouts,
-                    'measurements': self.measurements,
-                    'sleep_logs': self.sleep_logs,
-                    'water_intake': self.water_intake,
-                    'mood_logs': self.mood_logs,
-                    'goals': self.goals,
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving health data: {e}")
+    def _apply_snapshot(self, data: Dict[str, Any]):
+        self.workouts = data.get('workouts', {})
+        self.measurements = data.get('measurements', {})
+        self.sleep_logs = data.get('sleep_logs', {})
+        self.water_intake = data.get('water_intake', {})
+        self.mood_logs = data.get('mood_logs', {})
+        self.goals = data.get('goals', {})
+    
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        return {
+            'workouts': self.workouts,
+            'measurements': self.measurements,
+            'sleep_logs': self.sleep_logs,
+            'water_intake': self.water_intake,
+            'mood_logs': self.mood_logs,
+            'goals': self.goals
+        }
+    
+    def _rebuild_indexes(self):
+        for collection in _BY_DAY:
+            self._by_day[collection] = {}
+            self._days[collection] = []
+            self._daily[collection] = {}
+            for entry_id, entry in getattr(self, collection).items():
+                self._index_entry(collection, entry_id, entry)
+        
+        self._measurements_by_type = {}
+        for measurement_id, measurement in self.measurements.items():
+            self._index_measurement(measurement_id, measurement)
     
+    def _index_entry(self, collection: str, entry_id: str, entry: Dict[str, Any]):
+        new_day, add = _BY_DAY[collection]
+        day = entry['date'][:10]
+        ids = self._by_day[collection].get(day)
+        if ids is None:
+            ids = self._by_day[collection][day] = []
+            self._daily[collection][day] = new_day()
+            insort(self._days[collection], day)
+        ids.append(entry_id)
+        add(self._daily[collection][day], entry)
+    
+    def _index_measurement(self, measurement_id: str, measurement: Dict[str, Any]):
+        columns = self._measurements_by_type.get(measurement['type'])
+        if columns is None:
+            columns = self._measurements_by_type[measurement['type']] = {'date': [], 'id': []}
+        # Inserting before equal dates lets a reversed read keep ties in logging order
+        i = bisect_left(columns['date'], measurement['date'])
+        columns['date'].insert(i, measurement['date'])
+        columns['id'].insert(i, measurement_id)
+    
+    def _window(self, collection: str, cutoff: str) -> List[Dict[str, Any]]:
+        """Daily summaries covering the entries dated at or after cutoff.
+        
+        A date whose first ten characters sort after cutoff's also sorts after
+        cutoff, so only entries on cutoff's own day need the full comparison.
+        """
+        new_day, add = _BY_DAY[collection]
+        days = self._days[collection]
+        daily = self._daily[collection]
+        start = bisect_left(days, cutoff[:10])
+        buckets = [daily[day] for day in days[start + 1:]]
+        
+        if start < len(days):
+            day = days[start]
+            if day >= cutoff:
+                buckets.append(daily[day])
+            else:
+                entries = getattr(self, collection)
+                partial = new_day()
+                for entry_id in self._by_day[collection][day]:
+                    if entries[entry_id]['date'] >= cutoff:
+                        add(partial, entries[entry_id])
+                buckets.append(partial)
+        return buckets
+    
+    @safe(None, "logging workout")
+    @locked
     def log_workout(self, workout_type: str, duration: int, calories: int = None,
                    distance: float = None, notes: str = "", date: str = None) -> Optional[str]:
-        if not self.enabled:
-            return None
+        now = datetime.now().isoformat()
+        workout_id = secrets.token_hex(4)
+        workout_date = date or now
         
-        try:
-            workout_id = str(uuid.uuid4())[:8]
-            workout_date = date or datetime.now().isoformat()
-            
-            self.workouts[workout_id] = {
-                'id': workout_id,
-                'type': workout_type,
-                'duration': duration,
-                'calories': calories,
-                'distance': distance,
-                'notes': notes,
-                'date': workout_date,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            self._save_data()
-            logger.info(f"Logged workout: {workout_type}")
-            return workout_id
-            
-        except Exception as e:
-            logger.error(f"Error logging workout: {e}")
-            return None
+        self.workouts[workout_id] = {
+            'id': workout_id,
+            'type': workout_type,
+            'duration': duration,
+            'calories': calories,
+            'distance': distance,
+            'notes': notes,
+            'date': workout_date,
+            'created_at': now
+        }
+        
+        self._index_entry('workouts', workout_id, self.workouts[workout_id])
+        self._mark_dirty('workouts', workout_id)
+        logger.info(f"Logged workout: {workout_type}")
+        return workout_id
     
+    @safe(None, "logging measurement")
+    @locked
     def log_measurement(self, measurement_type: str, value: float, unit: str = "",
                        notes: str = "", date: str = None) -> Optional[str]:
-        if not self.enabled:
-            return None
+        now = datetime.now().isoformat()
+        measurement_id = secrets.token_hex(4)
+        measurement_date = date or now
         
-        try:
-            measurement_id = str(uuid.uuid4())[:8]
-            measurement_date = date or datetime.now().isoformat()
-            
-            self.measurements[measurement_id] = {
-                'id': measurement_id,
-                'type': measurement_type,
-                'value': float(value),
-                'unit': unit,
-                'notes': notes,
-                'date': measurement_date,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            self._save_data()
-            logger.info(f"Logged measurement: {measurement_type} = {value} {unit}")
-            return measurement_id
-            
-        except Exception as e:
-            logger.error(f"Error logging measurement: {e}")
-            return None
+        self.measurements[measurement_id] = {
+            'id': measurement_id,
+            'type': measurement_type,
+            'value': float(value),
+            'unit': unit,
+            'notes': notes,
+            'date': measurement_date,
+            'created_at': now
+        }
+        
+        self._index_measurement(measurement_id, self.measurements[measurement_id])
+        self._mark_dirty('measurements', measurement_id)
+        logger.info(f"Logged measurement: {measurement_type} = {value} {unit}")
+        return measurement_id
     
+    @safe(None, "logging sleep")
+    @locked
     def log_sleep(self, hours: float, quality: str = None, notes: str = "",
                  date: str = None) -> Optional[str]:
-        if not self.enabled:
-            return None
+        now = datetime.now()
+        sleep_id = secrets.token_hex(4)
+        sleep_date = date or now.date().isoformat()
         
-        try:
-            sleep_id = str(uuid.uuid4())[:8]
-            sleep_date = date or datetime.now().date().isoformat()
-            
-            self.sleep_logs[sleep_id] = {
-                'id': sleep_id,
-                'hours': float(hours),
-                'quality': quality,
-                'notes': notes,
-                'date': sleep_date,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            self._save_data()
-            logger.info(f"Logged sleep: {hours} hours")
-            return sleep_id
-            
-        except Exception as e:
-            logger.error(f"Error logging sleep: {e}")
-            return None
+        self.sleep_logs[sleep_id] = {
+            'id': sleep_id,
+            'hours': float(hours),
+            'quality': quality,
+            'notes': notes,
+            'date': sleep_date,
+            'created_at': now.isoformat()
+        }
+        
+        self._index_entry('sleep_logs', sleep_id, self.sleep_logs[sleep_id])
+        self._mark_dirty('sleep_logs', sleep_id)
+        logger.info(f"Logged sleep: {hours} hours")
+        return sleep_id
     
+    @safe(False, "logging water")
+    @locked
     def log_water(self, amount: float, unit: str = "ml", date: str = None) -> bool:
-        if not self.enabled:
-            return False
+        now = datetime.now()
+        water_date = date or now.date().isoformat()
         
-        try:
-            water_date = date or datetime.now().date().isoformat()
-            
-            if water_date not in self.water_intake:
-                self.water_intake[water_date] = {'total': 0.0, 'unit': unit, 'logs': []}
-            
-            self.water_intake[water_date]['total'] += float(amount)
-            self.water_intake[water_date]['logs'].append({
-                'amount': float(amount),
-                'time': datetime.now().isoformat()
-            })
-            
-            self._save_data()
-            logger.info(f"Logged water: {amount} {unit}")
-            return {"measurement_id": measurement_id, "type": measurement_type, "value": value, "unit": unit}
-            
-        except Exception as e:
-            logger.error(f"Error logging water: {e}")
-            return False
+        if water_date not in self.water_intake:
+            self.water_intake[water_date] = {'total': 0.0, 'unit': unit, 'logs': []}
+        
+        self.water_intake[water_date]['total'] += float(amount)
+        self.water_intake[water_date]['logs'].append({
+            'amount': float(amount),
+            'time': now.isoformat()
+        })
+        
+        self._mark_dirty('water_intake', water_date)
+        logger.info(f"Logged water: {amount} {unit}")
+        return True
     
+    @safe(None, "logging mood")
+    @locked
     def log_mood(self, mood: str, rating: int, notes: str = "", date: str = None) -> Optional[str]:
-        if not self.enabled:
-            return None
+        now = datetime.now().isoformat()
+        mood_id = secrets.token_hex(4)
+        mood_date = date or now
         
-        try:
-            mood_id = str(uuid.uuid4())[:8]
-            mood_date = date or datetime.now().isoformat()
-            
-            self.mood_logs[mood_id] = {
-                'id': mood_id,
-                'mood': mood,
-                'rating': max(1, min(10, int(rating))),
-                'notes': notes,
-                'date': mood_date,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            self._save_data()
-            logger.info(f"Logged mood: {mood} ({rating}/10)")
-            return mood_id
-            
-        except Exception as e:
-            logger.error(f"Error logging mood: {e}")
-            return None
+        self.mood_logs[mood_id] = {
+            'id': mood_id,
+            'mood': mood,
+            'rating': clamp_rating(int(rating)),
+            'notes': notes,
+            'date': mood_date,
+            'created_at': now
+        }
+        
+        self._index_entry('mood_logs', mood_id, self.mood_logs[mood_id])
+        self._mark_dirty('mood_logs', mood_id)
+        logger.info(f"Logged mood: {mood} ({rating}/10)")
+        return mood_id
     
+    @safe(None, "setting health goal")
+    @locked
     def set_health_goal(self, goal_type: str, target_value: float, unit: str = "",
                        deadline: str = None) -> Optional[str]:
-        if not self.enabled:
-            return None
+        goal_id = secrets.token_hex(4)
         
-        try:
-            goal_id = str(uuid.uuid4())[:8]
-            
-            self.goals[goal_id] = {
-                'id': goal_id,
-                'type': goal_type,
-                'target_value': float(target_value),
-                'unit': unit,
-                'deadline': deadline,
-                'created_at': datetime.now().isoformat(),
-                'status': 'active'
-            }
-            
-            self._save_data()
-            logger.info(f"Set health goal: {goal_type} = {target_value} {unit}")
-            return goal_id
-            
-        except Exception as e:
-            logger.error(f"Error setting health goal: {e}")
-            return None
+        self.goals[goal_id] = {
+            'id': goal_id,
+            'type': goal_type,
+            'target_value': float(target_value),
+            'unit': unit,
+            'deadline': deadline,
+            'created_at': datetime.now().isoformat(),
+            'status': 'active'
+        }
+        
+        self._mark_dirty('goals', goal_id)
+        logger.info(f"Set health goal: {goal_type} = {target_value} {unit}")
+        return goal_id
     
+    @safe(None, "getting workout summary")
     def get_workout_summary(self, days: int = 7) -> Optional[Dict[str, Any]]:
-        if not self.enabled:
-            return None
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        total_workouts = total_duration = total_calories = total_distance = 0
+        workout_types = Counter()
+        for b in self._window('workouts', cutoff):
+            total_workouts += b['count']
+            total_duration += b['duration']
+            total_calories += b['calories']
+            total_distance += b['distance']
+            workout_types.update(b['types'])
         
-        try:
-            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-            recent_workouts = [w for w in self.workouts.values() 
-                             if w['date'] >= cutoff]
-            
-            total_duration = sum(w['duration'] for w in recent_workouts)
-            total_calories = sum(w.get('calories', 0) for w in recent_workouts if w.get('calories'))
-            total_distance = sum(w.get('distance', 0) for w in recent_workouts if w.get('distance'))
-            
-            workout_types = defaultdict(int)
-            for w in recent_workouts:
-                workout_types[w['type']] += 1
-            
-            return {
-                'period_days': days,
-                'total_workouts': len(recent_workouts),
-                'total_duration': total_duration,
-                'total_calories': total_calories,
-                'total_distance': total_distance,
-                'workout_types': dict(workout_types),
-                'avg_duration': total_duration / len(recent_workouts) if recent_workouts else 0
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting workout summary: {e}")
-            return None
+        return {
+            'period_days': days,
+            'total_workouts': total_workouts,
+            'total_duration': total_duration,
+            'total_calories': total_calories,
+            'total_distance': total_distance,
+            'workout_types': dict(workout_types),
+            'avg_duration': total_duration / total_workouts if total_workouts else 0
+        }
     
+    @safe(None, "getting sleep summary")
     def get_sleep_summary(self, days: int = 7) -> Optional[Dict[str, Any]]:
-        if not self.enabled:
-            return None
+        cutoff = (datetime.now() - timedelta(days=days)).date().isoformat()
+        total_nights = total_hours = 0
+        quality_counts = Counter()
+        for b in self._window('sleep_logs', cutoff):
+            total_nights += b['count']
+            total_hours += b['hours']
+            quality_counts.update(b['quality'])
         
-        try:
-            cutoff = (datetime.now() - timedelta(days=days)).date().isoformat()
-            recent_sleep = [s for s in self.sleep_logs.values() 
-                           if s['date'] >= cutoff]
-            
-            total_hours = sum(s['hours'] for s in recent_sleep)
-            quality_counts = defaultdict(int)
-            for s in recent_sleep:
-                if s.get('quality'):
-                    quality_counts[s['quality']] += 1
-            
-            return {
-                'period_days': days,
-                'total_nights': len(recent_sleep),
-                'total_hours': total_hours,
-                'avg_hours': total_hours / len(recent_sleep) if recent_sleep else 0,
-                'quality_distribution': dict(quality_counts)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting sleep summary: {e}")
-            return None
+        return {
+            'period_days': days,
+            'total_nights': total_nights,
+            'total_hours': total_hours,
+            'avg_hours': total_hours / total_nights if total_nights else 0,
+            'quality_distribution': dict(quality_counts)
+        }
     
+    @safe(None, "getting water intake")
     def get_today_water(self) -> Optional[Dict[str, Any]]:
-        if not self.enabled:
-            return None
-        
-        try:
-            today = datetime.now().date().isoformat()
-            if today in self.water_intake:
-                return {
-                    'total': self.water_intake[today]['total'],
-                    'unit': self.water_intake[today]['unit'],
-                    'logs_count': len(self.water_intake[today]['logs'])
-                }
-            return {'total': 0, 'unit': 'ml', 'logs_count': 0}
-            
-        except Exception as e:
-            logger.error(f"Error getting water intake: {e}")
-            return None
+        today = datetime.now().date().isoformat()
+        if today in self.water_intake:
+            return {
+                'total': self.water_intake[today]['total'],
+                'unit': self.water_intake[today]['unit'],
+                'logs_count': len(self.water_intake[today]['logs'])
+            }
+        return {'total': 0, 'unit': 'ml', 'logs_count': 0}
     
+    @safe(list, "getting measurement history")
     def get_measurement_history(self, measurement_type: str, days: int = 30) -> List[Dict[str, Any]]:
-        if not self.enabled:
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        columns = self._measurements_by_type.get(measurement_type)
+        if columns is None:
             return []
         
-        try:
-            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-            history = [m for m in self.measurements.values() 
-                      if m['type'] == measurement_type and m['date'] >= cutoff]
-            
-            return sorted(history, key=lambda x: x['date'], reverse=True)
-            
-        except Exception as e:
-            logger.error(f"Error getting measurement history: {e}")
-            return []
+        start = bisect_left(columns['date'], cutoff)
+        return [self.measurements[i] for i in reversed(columns['id'][start:])]
     
+    @safe(None, "getting mood analytics")
     def get_mood_analytics(self, days: int = 30) -> Optional[Dict[str, Any]]:
-        if not self.enabled:
-            return None
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        total_logs = rating_total = 0
+        min_rating = max_rating = None
+        mood_counts = Counter()
+        for b in self._window('mood_logs', cutoff):
+            if not b['count']:
+                continue
+            total_logs += b['count']
+            rating_total += b['rating_total']
+            if min_rating is None or b['min_rating'] < min_rating:
+                min_rating = b['min_rating']
+            if max_rating is None or b['max_rating'] > max_rating:
+                max_rating = b['max_rating']
+            mood_counts.update(b['moods'])
         
-        try:
-            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-            recent_moods = [m for m in self.mood_logs.values() 
-                           if m['date'] >= cutoff]
-            
-            if not recent_moods:
-                return None
-            
-            ratings = [m['rating'] for m in recent_moods]
-            mood_counts = defaultdict(int)
-            for m in recent_moods:
-                mood_counts[m['mood']] += 1
-            
-            return {
-                'period_days': days,
-                'total_logs': len(recent_moods),
-                'avg_rating': sum(ratings) / len(ratings),
-                'min_rating': min(ratings),
-                'max_rating': max(ratings),
-                'mood_distribution': dict(mood_counts)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting mood analytics: {e}")
+        if not total_logs:
             return None
+        
+        return {
+            'period_days': days,
+            'total_logs': total_logs,
+            'avg_rating': rating_total / total_logs,
+            'min_rating': min_rating,
+            'max_rating': max_rating,
+            'mood_distribution': dict(mood_counts)
+        }
     
     def get_stats(self) -> Dict[str, Any]:
         return {
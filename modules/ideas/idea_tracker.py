@@ -1,269 +1,342 @@
 import logging
-import json
 import os
+import atexit
+import heapq
 from typing import Dict, Any, List, Optional
+from operator import itemgetter
 from datetime import datetime
-from collections import defaultdict
-import uuid
+from collections import Counter, defaultdict
+import secrets
+
+from ..tracker_base import LogStore, clamp_rating, disable_methods, discard, locked, safe, trigrams
 
 logger = logging.getLogger(__name__)
 
-class IdeaTracker:
+
+def _search_text(idea: Dict[str, Any]) -> str:
+    # NUL keeps a query from matching across the end of one field and the start of the next
+    return '\0'.join((idea.get('title') or '',
+                      idea.get('description') or '',
+                      ' '.join(idea.get('tags', [])))).lower()
+
+
+# What each gated method returns while the tracker is disabled; callables
+# are called so every caller gets a fresh object
+_DISABLED_RESULTS = {
+    'add_idea': None,
+    'create_board': None,
+    'add_note_to_idea': False,
+    'rate_idea': False,
+    'update_idea_status': False,
+    'link_ideas': False,
+    'toggle_favorite': False,
+    'archive_idea': False,
+    'delete_idea': False,
+}
+
+
+class IdeaTracker(LogStore):
+    _collections = ('ideas', 'boards')
+    
     def __init__(self, config: dict):
         self.config = config
         self.enabled = config.get('enabled', True)
-        self.storage_path = config.get('storage_path', 'data/ideas.json')
+        self._init_store(config, 'ideas', save_interval=2.0)
         
         self.ideas = {}
         self.boards = {}
         self.tags = set()
         
+        # Inverted indexes over ideas; the inner dicts are insertion-ordered id sets
+        self._ideas_by_board: Dict[Optional[str], Dict[str, None]] = defaultdict(dict)
+        self._ideas_by_tag: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._ideas_by_status: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._favorites: Dict[str, None] = {}
+        self._trigram_index: Dict[str, Dict[str, None]] = defaultdict(dict)
+        # Lowercased title, description and tags per idea; derived, never persisted
+        self._search_text: Dict[str, str] = {}
+        # Position of each idea in self.ideas, so index hits keep listing order
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        
         if self.enabled:
+            os.makedirs(os.path.dirname(self.storage_path) or '.', exist_ok=True)
             self._load_data()
+            atexit.register(self.flush)
+        else:
+            disable_methods(self, _DISABLED_RESULTS)
         
         logger.info("IdeaTracker initialized")
     
     def _load_data(self):
         try:
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.ideas = data.get('ideas', {})
-                    self.boards = data.get('boards', {})
-                    self.tags = set(data.get('tags', []))
+            if self._load_store():
                 logger.info(f"Loaded {len(self.ideas)} ideas")
+            self._rebuild_indexes()
         except Exception as e:
             logger.error(f"Error loading ideas: {e}")
     
-    def _save_data(self):
-        try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump({
-                    'ideas': self.ideas,
-                    'boards': self.boards,
-                    'tags': list(self.tags),
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving ideas: {e}")
+    def _apply_snapshot(self, data: Dict[str, Any]):
+        self.ideas = data.get('ideas', {})
+        self.boards = data.get('boards', {})
+        self.tags = set(data.get('tags', []))
     
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        return {
+            'ideas': self.ideas,
+            'boards': self.boards,
+            'tags': list(self.tags)
+        }
+    
+    def _apply_record(self, collection: str, key: str, value):
+        super()._apply_record(collection, key, value)
+        if collection == 'ideas' and value is not None:
+            self.tags.update(value.get('tags', []))
+    
+    def _rebuild_indexes(self):
+        self._ideas_by_board = defaultdict(dict)
+        self._ideas_by_tag = defaultdict(dict)
+        self._ideas_by_status = defaultdict(dict)
+        self._favorites = {}
+        self._trigram_index = defaultdict(dict)
+        self._search_text = {}
+        self._seq = {}
+        self._next_seq = 0
+        for idea_id, idea in self.ideas.items():
+            self._index_idea(idea_id, idea)
+    
+    def _index_idea(self, idea_id: str, idea: Dict[str, Any]):
+        if idea_id not in self._seq:
+            self._seq[idea_id] = self._next_seq
+            self._next_seq += 1
+        self._ideas_by_board[idea.get('board_id')][idea_id] = None
+        for tag in idea.get('tags', []):
+            self._ideas_by_tag[tag][idea_id] = None
+        self._ideas_by_status[idea.get('status')][idea_id] = None
+        if idea.get('favorite', False):
+            self._favorites[idea_id] = None
+        text = self._search_text[idea_id] = _search_text(idea)
+        for gram in trigrams(text):
+            self._trigram_index[gram][idea_id] = None
+    
+    def _unindex_idea(self, idea_id: str, idea: Dict[str, Any]):
+        discard(self._ideas_by_board, idea.get('board_id'), idea_id)
+        for tag in idea.get('tags', []):
+            discard(self._ideas_by_tag, tag, idea_id)
+        discard(self._ideas_by_status, idea.get('status'), idea_id)
+        self._favorites.pop(idea_id, None)
+        for gram in trigrams(self._search_text.pop(idea_id, '')):
+            discard(self._trigram_index, gram, idea_id)
+    
+    def _in_order(self, idea_ids) -> List[Dict[str, Any]]:
+        ideas = (self.ideas[i] for i in sorted(idea_ids, key=self._seq.__getitem__))
+        return [idea for idea in ideas if not idea.get('archived', False)]
+    
+    @safe(None, "adding idea")
+    @locked
     def add_idea(self, title: str, description: str = "", category: str = None,
                 tags: List[str] = None, board_id: str = None, priority: str = "medium") -> Optional[str]:
-        if not self.enabled:
-            return None
+        now = datetime.now().isoformat()
+        idea_id = secrets.token_hex(4)
         
-        try:
-            idea_id = str(uuid.uuid4())[:8]
-            
-            idea_tags = tags or []
-            self.tags.update(idea_tags)
-            
-            self.ideas[idea_id] = {
-                'id': idea_id,
-                'title': title,
-                'description': description,
-                'category': category,
-                'tags': idea_tags,
-                'board_id': board_id,
-                'priority': priority,
-                'status': 'new',
-                'notes': [],
-                'related_ideas': [],
-                'rating': None,
-                'feasibility': None,
-                'impact': None,
-                'effort': None,
-                'favorite': False,
-                'archived': False,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
-            
-            self._save_data()
-            logger.info(f"Added idea: {title}")
-            return self.ideas[idea_id].copy()
-            
-        except Exception as e:
-            logger.error(f"Error adding idea: {e}")
-            return None
+        idea_tags = tags or []
+        self.tags.update(idea_tags)
+        
+        self.ideas[idea_id] = {
+            'id': idea_id,
+            'title': title,
+            'description': description,
+            'category': category,
+            'tags': idea_tags,
+            'board_id': board_id,
+            'priority': priority,
+            'status': 'new',
+            'notes': [],
+            'related_ideas': [],
+            'rating': None,
+            'feasibility': None,
+            'impact': None,
+            'effort': None,
+            'favorite': False,
+            'archived': False,
+            'created_at': now,
+            'updated_at': now
+        }
+        
+        self._index_idea(idea_id, self.ideas[idea_id])
+        self._mark_dirty('ideas', idea_id)
+        logger.info(f"Added idea: {title}")
+        return self.ideas[idea_id].copy()
     
+    @safe(None, "creating board")
+    @locked
     def create_board(self, name: str, description: str = "", color: str = None) -> Optional[str]:
-        if not self.enabled:
-            return None
+        board_id = secrets.token_hex(4)
         
-        try:
-            board_id = str(uuid.uuid4())[:8]
-            
-            self.boards[board_id] = {
-                'id': board_id,
-                'name': name,
-                'description': description,
-                'color': color,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            self._save_data()
-            logger.info(f"Created idea board: {name}")
-            return board_id
-            
-        except Exception as e:
-            logger.error(f"Error creating board: {e}")
-            return None
+        self.boards[board_id] = {
+            'id': board_id,
+            'name': name,
+            'description': description,
+            'color': color,
+            'created_at': datetime.now().isoformat()
+        }
+        
+        self._mark_dirty('boards', board_id)
+        logger.info(f"Created idea board: {name}")
+        return board_id
     
+    @safe(False, "adding note")
+    @locked
     def add_note_to_idea(self, idea_id: str, note: str) -> bool:
-        if not self.enabled or idea_id not in self.ideas:
+        if idea_id not in self.ideas:
             return False
         
-        try:
-            note_entry = {
-                'id': str(uuid.uuid4())[:8],
-                'content': note,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            self.ideas[idea_id]['notes'].append(note_entry)
-            self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
-            self._save_data()
-            logger.info(f"Added note to idea: {idea_id}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error adding note: {e}")
-            return False
+        now = datetime.now().isoformat()
+        note_entry = {
+            'id': secrets.token_hex(4),
+            'content': note,
+            'created_at': now
+        }
+        
+        self.ideas[idea_id]['notes'].append(note_entry)
+        self.ideas[idea_id]['updated_at'] = now
+        self._mark_dirty('ideas', idea_id)
+        logger.info(f"Added note to idea: {idea_id}")
+        return True
     
+    @safe(False, "rating idea")
+    @locked
     def rate_idea(self, idea_id: str, rating: int, feasibility: str = None,
                  impact: str = None, effort: str = None) -> bool:
-        if not self.enabled or idea_id not in self.ideas:
+        if idea_id not in self.ideas:
             return False
         
-        try:
-            self.ideas[idea_id]['rating'] = max(1, min(10, rating))
-            if feasibility:
-                self.ideas[idea_id]['feasibility'] = feasibility
-            if impact:
-                self.ideas[idea_id]['impact'] = impact
-            if effort:
-                self.ideas[idea_id]['effort'] = effort
-            
-            self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
-            self._save_data()
-            logger.info(f"Rated idea {idea_id}: {rating}/10")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error rating idea: {e}")
-            return False
+        self.ideas[idea_id]['rating'] = clamp_rating(rating)
+        if feasibility:
+            self.ideas[idea_id]['feasibility'] = feasibility
+        if impact:
+            self.ideas[idea_id]['impact'] = impact
+        if effort:
+            self.ideas[idea_id]['effort'] = effort
+        
+        self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
+        self._mark_dirty('ideas', idea_id)
+        logger.info(f"Rated idea {idea_id}: {rating}/10")
+        return True
     
+    @safe(False, "updating idea status")
+    @locked
     def update_idea_status(self, idea_id: str, status: str) -> bool:
-        if not self.enabled or idea_id not in self.ideas:
+        if idea_id not in self.ideas:
             return False
         
-        try:
-            valid_statuses = ['new', 'exploring', 'in_progress', 'implemented', 'abandoned']
-            if status not in valid_statuses:
-                return False
-            
-            self.ideas[idea_id]['status'] = status
-            self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
-            self._save_data()
-            logger.info(f"Updated idea {idea_id} status to: {status}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error updating idea status: {e}")
+        valid_statuses = ['new', 'exploring', 'in_progress', 'implemented', 'abandoned']
+        if status not in valid_statuses:
             return False
+        
+        discard(self._ideas_by_status, self.ideas[idea_id].get('status'), idea_id)
+        self._ideas_by_status[status][idea_id] = None
+        self.ideas[idea_id]['status'] = status
+        self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
+        self._mark_dirty('ideas', idea_id)
+        logger.info(f"Updated idea {idea_id} status to: {status}")
+        return True
     
+    @safe(False, "linking ideas")
+    @locked
     def link_ideas(self, idea_id1: str, idea_id2: str) -> bool:
-        if not self.enabled or idea_id1 not in self.ideas or idea_id2 not in self.ideas:
+        if idea_id1 not in self.ideas or idea_id2 not in self.ideas:
             return False
         
-        try:
-            if idea_id2 not in self.ideas[idea_id1]['related_ideas']:
-                self.ideas[idea_id1]['related_ideas'].append(idea_id2)
-            if idea_id1 not in self.ideas[idea_id2]['related_ideas']:
-                self.ideas[idea_id2]['related_ideas'].append(idea_id1)
-            
-            self._save_data()
-            logger.info(f"Linked ideas: {idea_id1} <-> {idea_id2}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error linking ideas: {e}")
-            return False
+        if idea_id2 not in self.ideas[idea_id1]['related_ideas']:
+            self.ideas[idea_id1]['related_ideas'].append(idea_id2)
+        if idea_id1 not in self.ideas[idea_id2]['related_ideas']:
+            self.ideas[idea_id2]['related_ideas'].append(idea_id1)
+        
+        self._mark_dirty('ideas', idea_id1, idea_id2)
+        logger.info(f"Linked ideas: {idea_id1} <-> {idea_id2}")
+        return True
     
+    @safe(False, "toggling favorite")
+    @locked
     def toggle_favorite(self, idea_id: str) -> bool:
-        if not self.enabled or idea_id not in self.ideas:
+        if idea_id not in self.ideas:
             return False
         
-        try:
-            self.ideas[idea_id]['favorite'] = not self.ideas[idea_id]['favorite']
-            self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
-            self._save_data()
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error toggling favorite: {e}")
-            return False
+        self.ideas[idea_id]['favorite'] = not self.ideas[idea_id]['favorite']
+        if self.ideas[idea_id]['favorite']:
+            self._favorites[idea_id] = None
+        else:
+            self._favorites.pop(idea_id, None)
+        self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
+        self._mark_dirty('ideas', idea_id)
+        return True
     
+    @safe(False, "archiving idea")
+    @locked
     def archive_idea(self, idea_id: str, archived: bool = True) -> bool:
-        if not self.enabled or idea_id not in self.ideas:
+        if idea_id not in self.ideas:
             return False
         
-        try:
-            self.ideas[idea_id]['archived'] = archived
-            self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
-            self._save_data()
-            logger.info(f"Idea {idea_id} archived: {archived}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error archiving idea: {e}")
-            return False
+        self.ideas[idea_id]['archived'] = archived
+        self.ideas[idea_id]['updated_at'] = datetime.now().isoformat()
+        self._mark_dirty('ideas', idea_id)
+        logger.info(f"Idea {idea_id} archived: {archived}")
+        return True
     
     def get_idea(self, idea_id: str) -> Optional[Dict[str, Any]]:
         return self.ideas.get(idea_id)
     
     def list_ideas(self, category: str = None, board_id: str = None,
                   status: str = None, archived: bool = False) -> List[Dict[str, Any]]:
-        ideas = list(self.ideas.values())
-        
-        if not archived:
-            ideas = [i for i in ideas if not i.get('archived', False)]
-        
-        if category:
-            ideas = [i for i in ideas if i.get('category') == category]
         if board_id:
-            ideas = [i for i in ideas if i.get('board_id') == board_id]
-        if status:
-            ideas = [i for i in ideas if i.get('status') == status]
+            candidates = (self.ideas[i] for i in self._ideas_by_board.get(board_id, ()))
+        elif status:
+            candidates = (self.ideas[i] for i in self._ideas_by_status.get(status, ()))
+        else:
+            candidates = self.ideas.values()
+        
+        ideas = (i for i in candidates
+                 if (archived or not i.get('archived', False))
+                 and (not category or i.get('category') == category)
+                 and (not board_id or i.get('board_id') == board_id)
+                 and (not status or i.get('status') == status))
         
         return sorted(ideas, key=lambda x: x.get('created_at', ''), reverse=True)
     
     def get_favorites(self) -> List[Dict[str, Any]]:
-        return [i for i in self.ideas.values() if i.get('favorite', False) and not i.get('archived', False)]
+        return self._in_order(self._favorites)
     
     def search_ideas(self, query: str) -> List[Dict[str, Any]]:
         query_lower = query.lower()
         results = []
         
-        for idea in self.ideas.values():
+        # Ideas holding every trigram of the query are the only ones that can
+        # match; shorter queries fall back to checking every idea
+        grams = trigrams(query_lower)
+        if grams:
+            postings = sorted((self._trigram_index.get(gram, {}) for gram in grams), key=len)
+            candidates = (i for i in postings[0] if all(i in p for p in postings[1:]))
+        else:
+            candidates = self.ideas
+        
+        search_text = self._search_text
+        for idea_id in candidates:
+            idea = self.ideas[idea_id]
             if idea.get('archived', False):
                 continue
             
-            if (query_lower in idea['title'].lower() or
-                query_lower in idea.get('description', '').lower() or
-                query_lower in ' '.join(idea.get('tags', [])).lower()):
+            if query_lower in search_text[idea_id]:
                 results.append(idea)
         
         return results
     
     def get_ideas_by_tag(self, tag: str) -> List[Dict[str, Any]]:
-        return [i for i in self.ideas.values() if tag in i.get('tags', []) and not i.get('archived', False)]
+        return self._in_order(self._ideas_by_tag.get(tag, ()))
     
     def get_top_rated_ideas(self, limit: int = 10) -> List[Dict[str, Any]]:
-        rated_ideas = [i for i in self.ideas.values() if i.get('rating') and not i.get('archived', False)]
-        return sorted(rated_ideas, key=lambda x: x.get('rating', 0), reverse=True)[:limit]
+        rated_ideas = (i for i in self.ideas.values() if i.get('rating') and not i.get('archived', False))
+        return heapq.nlargest(limit, rated_ideas, key=itemgetter('rating'))
     
     def get_board(self, board_id: str) -> Optional[Dict[str, Any]]:
         return self.boards.get(board_id)
@@ -272,27 +345,29 @@ class IdeaTracker:
         return list(self.boards.values())
     
     def get_board_ideas(self, board_id: str) -> List[Dict[str, Any]]:
-        return [i for i in self.ideas.values() if i.get('board_id') == board_id and not i.get('archived', False)]
+        return self._in_order(self._ideas_by_board.get(board_id, ()))
     
     def get_stats(self) -> Dict[str, Any]:
         total_ideas = len(self.ideas)
-        active_ideas = sum(1 for i in self.ideas.values() if not i.get('archived', False))
-        archived_ideas = sum(1 for i in self.ideas.values() if i.get('archived', False))
-        favorites = sum(1 for i in self.ideas.values() if i.get('favorite', False))
-        
-        by_status = defaultdict(int)
-        by_category = defaultdict(int)
+        archived_ideas = favorites = rated_count = rating_total = 0
+        by_status = Counter()
+        by_category = Counter()
         
         for idea in self.ideas.values():
-            if not idea.get('archived', False):
+            if idea.get('archived', False):
+                archived_ideas += 1
+            else:
                 by_status[idea.get('status', 'new')] += 1
                 if idea.get('category'):
                     by_category[idea['category']] += 1
+            if idea.get('favorite', False):
+                favorites += 1
+            if idea.get('rating'):
+                rated_count += 1
+                rating_total += idea['rating']
         
-        avg_rating = None
-        rated_ideas = [i for i in self.ideas.values() if i.get('rating')]
-        if rated_ideas:
-            avg_rating = sum(i['rating'] for i in rated_ideas) / len(rated_ideas)
+        active_ideas = total_ideas - archived_ideas
+        avg_rating = rating_total / rated_count if rated_count else None
         
         return {
             'total_ideas': total_ideas,
@@ -304,16 +379,18 @@ class IdeaTracker:
             'by_status': dict(by_status),
             'by_category': dict(by_category),
             'avg_rating': round(avg_rating, 2) if avg_rating else None,
-            'rated_ideas': len(rated_ideas)
+            'rated_ideas': rated_count
         }
     def get_all_ideas(self):
         return self.list_ideas()
 
     
     
+    @locked
     def delete_idea(self, idea_id: str) -> bool:
-        if not self.enabled or idea_id not in self.ideas:
+        if idea_id not in self.ideas:
             return False
-        del self.ideas[idea_id]
-        self._save_data()
+        self._unindex_idea(idea_id, self.ideas.pop(idea_id))
+        del self._seq[idea_id]
+        self._mark_dirty('ideas', idea_id)
         return True
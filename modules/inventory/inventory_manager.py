@@ -1,67 +1,216 @@
 import logging
-import json
 import os
-from typing import Dict, Any, List, Optional
+import sys
+import atexit
+from bisect import bisect_left, insort
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
-import uuid
+from collections import Counter, defaultdict
+import secrets
+
+from ..tracker_base import LogStore, discard, locked, trigrams
 
 logger = logging.getLogger(__name__)
 
-class InventoryManager:
+
+def _search_text(item: Dict[str, Any]) -> str:
+    # NUL keeps a query from matching across the end of one field and the start of the next
+    return '\0'.join((item.get('name') or '',
+                      item.get('model') or '',
+                      item.get('serial_number') or '',
+                      item.get('notes') or '')).lower()
+
+
+def _adjust_value(totals: Dict[Any, list], key: Any, value: float, sign: int):
+    # [value, item count]; the key goes away with its last item so no float residue lingers
+    entry = totals.setdefault(key, [0.0, 0])
+    entry[1] += sign
+    if entry[1]:
+        entry[0] += sign * value
+    else:
+        del totals[key]
+
+
+def _adjust_count(counts: Counter, key: Any, sign: int):
+    counts[key] += sign
+    if not counts[key]:
+        del counts[key]
+
+
+def _check_indexable(item: Dict[str, Any]):
+    """Raise for fields the indexes and running tallies cannot take, before any are touched."""
+    for field in ('category', 'location', 'condition'):
+        hash(item.get(field))
+    _search_text(item)
+    for field in ('quantity', 'purchase_price'):
+        value = item.get(field)
+        if value is not None and not isinstance(value, (int, float)):
+            raise TypeError(f"{field} must be a number, not {type(value).__name__}")
+
+
+def _warranty_ordinal(value) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value[:10]).toordinal()
+    except Exception:
+        return None
+
+
+class InventoryManager(LogStore):
+    _collections = ('items', 'locations', 'categories')
+    _set_collections = ('categories',)
+    
     def __init__(self, config: dict):
         self.config = config
         self.enabled = config.get('enabled', True)
-        self.storage_path = config.get('storage_path', 'data/inventory.json')
+        self._init_store(config, 'inventory', save_interval=0.5)
         
         self.items = {}
         self.locations = {}
         self.categories = set(['Electronics', 'Furniture', 'Appliances', 'Tools', 'Clothing', 'Other'])
         
+        # Insertion-ordered id sets (dict keys) per category / location, plus
+        # trigram postings over the lowercased search fields
+        self._by_category: Dict[Any, Dict[str, None]] = {}
+        self._by_location: Dict[Any, Dict[str, None]] = {}
+        self._trigram_index: Dict[str, Dict[str, None]] = defaultdict(dict)
+        # Lowercased name, model, serial and notes per item; derived, never persisted
+        self._search_text: Dict[str, str] = {}
+        # Sorted (expiry day ordinal, seq, item_id) for items with a parseable warranty
+        self._warranties: List[tuple] = []
+        self._warranty_ord: Dict[str, int] = {}
+        # Running aggregates behind the value and stats getters
+        self._total_quantity = 0
+        self._total_value = 0.0
+        self._priced_items = 0
+        self._value_by_category: Dict[Any, list] = {}
+        self._value_by_location: Dict[Any, list] = {}
+        self._count_by_category = Counter()
+        self._count_by_location = Counter()
+        self._count_by_condition = Counter()
+        self._items_with_warranty = 0
+        # Position of each item in self.items, so index hits keep listing order
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        
         if self.enabled:
+            os.makedirs(os.path.dirname(self.storage_path) or '.', exist_ok=True)
             self._load_data()
+            atexit.register(self.flush)
         
         logger.info("InventoryManager initialized")
     
     def _load_data(self):
         try:
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.items = data.get('items', {})
-                    self.locations = data.get('locations', {})
-                    self.categories = set(data.get('categories', list(self.categories)))
+            if self._load_store():
                 logger.info(f"Loaded {len(self.items)} inventory items")
+            self._rebuild_indexes()
         except Exception as e:
             logger.error(f"Error loading inventory data: {e}")
     
-    def _save_data(self):
-        try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump({
-                    'items': self.items,
-                    'locations': self.locations,
-                    'categories': list(self.categories),
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving inventory data: {e}")
+    def _apply_snapshot(self, data: Dict[str, Any]):
+        self.items = data.get('items', {})
+        self.locations = data.get('locations', {})
+        self.categories = set(data.get('categories', list(self.categories)))
+    
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        return {
+            'items': self.items,
+            'locations': self.locations,
+            'categories': list(self.categories)
+        }
+    
+    def _rebuild_indexes(self):
+        self._by_category = {}
+        self._by_location = {}
+        self._trigram_index = defaultdict(dict)
+        self._search_text = {}
+        self._warranties = []
+        self._warranty_ord = {}
+        self._total_quantity = 0
+        self._total_value = 0.0
+        self._priced_items = 0
+        self._value_by_category = {}
+        self._value_by_location = {}
+        self._count_by_category = Counter()
+        self._count_by_location = Counter()
+        self._count_by_condition = Counter()
+        self._items_with_warranty = 0
+        self._seq = {}
+        self._next_seq = 0
+        for item_id, item in self.items.items():
+            self._index_item(item_id, item)
+        self._warranties.sort()
+    
+    @staticmethod
+    def _intern_fields(item: Dict[str, Any]):
+        for field in ('category', 'location', 'condition'):
+            value = item.get(field)
+            if isinstance(value, str):
+                item[field] = sys.intern(value)
     
+    def _index_item(self, item_id: str, item: Dict[str, Any]):
+        self._intern_fields(item)
+        if item_id not in self._seq:
+            self._seq[item_id] = self._next_seq
+            self._next_seq += 1
+        self._by_category.setdefault(item.get('category'), {})[item_id] = None
+        self._by_location.setdefault(item.get('location'), {})[item_id] = None
+        text = self._search_text[item_id] = _search_text(item)
+        for gram in trigrams(text):
+            self._trigram_index[gram][item_id] = None
+        ordinal = _warranty_ordinal(item.get('warranty_expiry'))
+        if ordinal is not None:
+            self._warranty_ord[item_id] = ordinal
+            insort(self._warranties, (ordinal, self._seq[item_id], item_id))
+        self._tally(item, 1)
+    
+    def _unindex_item(self, item_id: str, item: Dict[str, Any]):
+        discard(self._by_category, item.get('category'), item_id)
+        discard(self._by_location, item.get('location'), item_id)
+        for gram in trigrams(self._search_text.pop(item_id, '')):
+            discard(self._trigram_index, gram, item_id)
+        ordinal = self._warranty_ord.pop(item_id, None)
+        if ordinal is not None:
+            del self._warranties[bisect_left(self._warranties, (ordinal, self._seq[item_id], item_id))]
+        self._tally(item, -1)
+    
+    def _tally(self, item: Dict[str, Any], sign: int):
+        """Add (sign=1) or remove (sign=-1) an item's share of the running aggregates."""
+        quantity = item.get('quantity', 1)
+        self._total_quantity += sign * quantity
+        if item.get('purchase_price'):
+            value = item['purchase_price'] * quantity
+            self._priced_items += sign
+            self._total_value = self._total_value + sign * value if self._priced_items else 0.0
+            _adjust_value(self._value_by_category, item.get('category', 'Uncategorized'), value, sign)
+            _adjust_value(self._value_by_location, item.get('location', 'Unknown'), value, sign)
+        if item.get('category'):
+            _adjust_count(self._count_by_category, item['category'], sign)
+        if item.get('location'):
+            _adjust_count(self._count_by_location, item['location'], sign)
+        _adjust_count(self._count_by_condition, item.get('condition', 'unknown'), sign)
+        if item.get('warranty_expiry'):
+            self._items_with_warranty += sign
+    
+    def _in_order(self, item_ids) -> List[Dict[str, Any]]:
+        return [self.items[i] for i in sorted(item_ids, key=self._seq.__getitem__)]
+    
+    @locked
     def add_item(self, name: str, category: str = None, location: str = None,
                 quantity: int = 1, purchase_date: str = None, purchase_price: float = None,
                 warranty_expiry: str = None, serial_number: str = None,
-                model: str = None, notes: str = "") -> Optional[str]:
+                model: str = None, notes: str = "") -> Optional[Mapping[str, Any]]:
         if not self.enabled:
             return None
         
         try:
-            item_id = str(uuid.uuid4())[:8]
-            
-            if category:
-                self.categories.add(category)
+            now = datetime.now().isoformat()
+            item_id = secrets.token_hex(4)
             
-            self.items[item_id] = {
+            item = {
                 'id': item_id,
                 'name': name,
                 'category': category,
@@ -74,30 +223,43 @@ class InventoryManager:
                 'model': model,
                 'notes': notes,
                 'condition': 'good',
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat(),
+                'created_at': now,
+                'updated_at': now,
                 'tags': []
             }
+            _check_indexable(item)
+            
+            if category and category not in self.categories:
+                self.categories.add(category)
+                self._mark_dirty('categories', category)
             
-            self._save_data()
+            self.items[item_id] = item
+            self._index_item(item_id, item)
+            
+            self._mark_dirty('items', item_id)
             logger.info(f"Added inventory item: {name}")
-            return self.items[item_id].copy()
+            return MappingProxyType(self.items[item_id])
             
         except Exception as e:
             logger.error(f"Error adding item: {e}")
             return None
     
+    @locked
     def update_item(self, item_id: str, **updates) -> bool:
         if not self.enabled or item_id not in self.items:
             return False
         
         try:
-            for key, value in updates.items():
-                if key in self.items[item_id]:
-                    self.items[item_id][key] = value
+            item = self.items[item_id]
+            changes = {key: value for key, value in updates.items() if key in item}
+            # Rejected before unindexing, so a bad value leaves the item and tallies as they were
+            _check_indexable({**item, **changes})
+            self._unindex_item(item_id, item)
+            item.update(changes)
+            self._index_item(item_id, item)
             
-            self.items[item_id]['updated_at'] = datetime.now().isoformat()
-            self._save_data()
+            item['updated_at'] = datetime.now().isoformat()
+            self._mark_dirty('items', item_id, fields=list(changes) + ['updated_at'])
             logger.info(f"Updated item: {item_id}")
             return True
             
@@ -105,13 +267,15 @@ class InventoryManager:
             logger.error(f"Error updating item: {e}")
             return False
     
+    @locked
     def delete_item(self, item_id: str) -> bool:
         if not self.enabled or item_id not in self.items:
             return False
         
         try:
-            del self.items[item_id]
-            self._save_data()
+            self._unindex_item(item_id, self.items.pop(item_id))
+            del self._seq[item_id]
+            self._mark_dirty('items', item_id)
             logger.info(f"Deleted item: {item_id}")
             return True
             
@@ -119,12 +283,13 @@ class InventoryManager:
             logger.error(f"Error deleting item: {e}")
             return False
     
+    @locked
     def add_location(self, name: str, description: str = "") -> Optional[str]:
         if not self.enabled:
             return None
         
         try:
-            location_id = str(uuid.uuid4())[:8]
+            location_id = secrets.token_hex(4)
             
             self.locations[location_id] = {
                 'id': location_id,
@@ -133,7 +298,7 @@ class InventoryManager:
                 'created_at': datetime.now().isoformat()
             }
             
-            self._save_data()
+            self._mark_dirty('locations', location_id)
             logger.info(f"Added location: {name}")
             return location_id
             
@@ -145,110 +310,72 @@ class InventoryManager:
         return self.items.get(item_id)
     
     def list_items(self, category: str = None, location: str = None) -> List[Dict[str, Any]]:
-        items = list(self.items.values())
-        
-        if category:
-            items = [i for i in items if i.get('category') == category]
-        if location:
-            items = [i for i in items if i.get('location') == location]
+        if category and location:
+            by_location = self._by_location.get(location, {})
+            items = self._in_order(i for i in self._by_category.get(category, {}) if i in by_location)
+        elif category:
+            items = self._in_order(self._by_category.get(category, {}))
+        elif location:
+            items = self._in_order(self._by_location.get(location, {}))
+        else:
+            items = list(self.items.values())
         
         return sorted(items, key=lambda x: x.get('name', ''))
     
     def search_items(self, query: str) -> List[Dict[str, Any]]:
         query_lower = query.lower()
-        results = []
         
-        for item in self.items.values():
-            if (query_lower in item['name'].lower() or
-                query_lower in item.get('model', '').lower() or
-                query_lower in item.get('serial_number', '').lower() or
-                query_lower in item.get('notes', '').lower()):
-                results.append(item)
+        grams = trigrams(query_lower)
+        if grams:
+            postings = sorted((self._trigram_index.get(gram, {}) for gram in grams), key=len)
+            candidates = sorted((i for i in postings[0] if all(i in p for p in postings[1:])),
+                                key=self._seq.__getitem__)
+        else:
+            candidates = self.items
         
-        return results
+        search_text = self._search_text
+        return [self.items[i] for i in candidates if query_lower in search_text[i]]
     
     def get_items_by_location(self, location: str) -> List[Dict[str, Any]]:
-        return [i for i in self.items.values() if i.get('location') == location]
+        return self._in_order(self._by_location.get(location, {}))
     
     def get_expiring_warranties(self, days: int = 60) -> List[Dict[str, Any]]:
         expiring = []
         now = datetime.now()
         cutoff = now + timedelta(days=days)
         
-        for item in self.items.values():
-            if not item.get('warranty_expiry'):
-                continue
-            
-            try:
-                expiry_date = datetime.fromisoformat(item['warranty_expiry'][:10])
-                if now <= expiry_date <= cutoff:
-                    days_until = (expiry_date - now).days
-                    item_copy = item.copy()
-                    item_copy['days_until_expiry'] = days_until
-                    expiring.append(item_copy)
-            except:
-                pass
+        # Expiry dates count from midnight: the first candidate day is the first
+        # midnight at or after now, the last is the cutoff's own day
+        start = bisect_left(self._warranties, ((now - timedelta(microseconds=1)).toordinal() + 1,))
+        end = bisect_left(self._warranties, (cutoff.toordinal() + 1,))
+        
+        for ordinal, _, item_id in self._warranties[start:end]:
+            item_copy = self.items[item_id].copy()
+            item_copy['days_until_expiry'] = (datetime.fromordinal(ordinal) - now).days
+            expiring.append(item_copy)
         
         return sorted(expiring, key=lambda x: x['warranty_expiry'])
     
     def get_total_value(self) -> float:
-        total = 0.0
-        for item in self.items.values():
-            if item.get('purchase_price'):
-                total += item['purchase_price'] * item.get('quantity', 1)
-        return round(total, 2)
+        return round(self._total_value, 2)
     
     def get_value_by_category(self) -> Dict[str, float]:
-        by_category = defaultdict(float)
-        
-        for item in self.items.values():
-            if item.get('purchase_price'):
-                category = item.get('category', 'Uncategorized')
-                value = item['purchase_price'] * item.get('quantity', 1)
-                by_category[category] += value
-        
-        return {k: round(v, 2) for k, v in by_category.items()}
+        return {k: round(v, 2) for k, (v, _) in self._value_by_category.items()}
     
     def get_value_by_location(self) -> Dict[str, float]:
-        by_location = defaultdict(float)
-        
-        for item in self.items.values():
-            if item.get('purchase_price'):
-                location = item.get('location', 'Unknown')
-                value = item['purchase_price'] * item.get('quantity', 1)
-                by_location[location] += value
-        
-        return {k: round(v, 2) for k, v in by_location.items()}
+        return {k: round(v, 2) for k, (v, _) in self._value_by_location.items()}
     
     def get_stats(self) -> Dict[str, Any]:
-        total_items = len(self.items)
-        total_quantity = sum(i.get('quantity', 1) for i in self.items.values())
-        total_value = self.get_total_value()
-        
-        by_category = defaultdict(int)
-        by_location = defaultdict(int)
-        by_condition = defaultdict(int)
-        
-        for item in self.items.values():
-            if item.get('category'):
-                by_category[item['category']] += 1
-            if item.get('location'):
-                by_location[item['location']] += 1
-            by_condition[item.get('condition', 'unknown')] += 1
-        
-        items_with_warranty = sum(1 for i in self.items.values() if i.get('warranty_expiry'))
-        expiring_soon = len(self.get_expiring_warranties(60))
-        
         return {
-            'total_items': total_items,
-            'total_quantity': total_quantity,
-            'total_value': total_value,
-            'by_category': dict(by_category),
-            'by_location': dict(by_location),
-            'by_condition': dict(by_condition),
+            'total_items': len(self.items),
+            'total_quantity': self._total_quantity,
+            'total_value': self.get_total_value(),
+            'by_category': dict(self._count_by_category),
+            'by_location': dict(self._count_by_location),
+            'by_condition': dict(self._count_by_condition),
             'total_locations': len(self.locations),
-            'items_with_warranty': items_with_warranty,
-            'warranties_expiring_soon': expiring_soon
+            'items_with_warranty': self._items_with_warranty,
+            'warranties_expiring_soon': len(self.get_expiring_warranties(60))
         }
     def get_all_items(self):
         return self.list_items()
@@ -1,53 +1,158 @@
 import logging
-import json
 import os
-from typing import Dict, Any, List, Optional
+import sys
+import random
+import heapq
+import atexit
+from bisect import bisect_left, bisect_right, insort
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
-import uuid
+from collections import Counter, defaultdict
+import secrets
+
+from ..tracker_base import LogStore, cache_result, copy_result, discard, locked, memoized, trigrams
 
 logger = logging.getLogger(__name__)
 
-class JournalSystem:
+
+def _search_text(entry: Dict[str, Any]) -> str:
+    # NUL keeps a query from matching across the end of the content and the start of the title
+    return '\0'.join((entry.get('content') or '', entry.get('title') or '')).lower()
+
+
+def _day_ordinal(entry_date) -> Optional[int]:
+    try:
+        return datetime.fromisoformat(entry_date[:10]).toordinal()
+    except Exception:
+        return None
+
+
+class JournalSystem(LogStore):
+    _collections = ('entries', 'prompts', 'tags')
+    _set_collections = ('tags',)
+    
     def __init__(self, config: dict):
         self.config = config
         self.enabled = config.get('enabled', True)
-        self.storage_path = config.get('storage_path', 'data/journal.json')
+        self._init_store(config, 'journal', save_interval=0.5)
         
         self.entries = {}
         self.prompts = {}
         self.tags = set()
         
+        # Number of entries written on each day, keyed by date ordinal
+        self._entry_days = Counter()
+        # Insertion-ordered id sets (dict keys) per tag / mood, trigram postings
+        # over content and title, and (date, seq, id) kept sorted for range scans
+        self._by_tag: Dict[str, Dict[str, None]] = {}
+        self._by_mood: Dict[Any, Dict[str, None]] = {}
+        self._trigram_index: Dict[str, Dict[str, None]] = defaultdict(dict)
+        # Lowercased content and title per entry; derived, never persisted
+        self._search_text: Dict[str, str] = {}
+        self._by_date: List[tuple] = []
+        # Entry ids per 'YYYY-MM-DD' date prefix
+        self._by_day: Dict[str, Dict[str, None]] = {}
+        # Position of each entry in self.entries, so index hits keep listing order
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        
+        # Prompt texts for get_prompt's random pick; rebuilt after prompts change
+        self._prompt_choices: Optional[tuple] = None
+        
+        # Read results keyed by (method, args..., day); cleared on every mutation
+        self._read_cache: Dict[tuple, Any] = {}
+        
         if self.enabled:
+            os.makedirs(os.path.dirname(self.storage_path) or '.', exist_ok=True)
             self._load_data()
-            self._load_default_prompts()
+            atexit.register(self.flush)
         
         logger.info("JournalSystem initialized")
     
     def _load_data(self):
         try:
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.entries = data.get('entries', {})
-                    self.prompts = data.get('prompts', {})
-                    self.tags = set(data.get('tags', []))
+            if self._load_store():
                 logger.info(f"Loaded {len(self.entries)} journal entries")
+            self._rebuild_indexes()
         except Exception as e:
             logger.error(f"Error loading journal data: {e}")
     
-    def _save_data(self):
-        try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump({
-                    'entries': self.entries,
-                    'prompts': self.prompts,
-                    'tags': list(self.tags),
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving journal data: {e}")
+    def _apply_snapshot(self, data: Dict[str, Any]):
+        self.entries = data.get('entries', {})
+        self.prompts = data.get('prompts', {})
+        self.tags = set(data.get('tags', []))
+    
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        return {
+            'entries': self.entries,
+            'prompts': self.prompts,
+            'tags': list(self.tags)
+        }
+    
+    def _before_replay(self):
+        # Defaults go in before replay so logged custom prompts land on top of them
+        self._load_default_prompts()
+    
+    def _rebuild_indexes(self):
+        self._entry_days = Counter()
+        self._by_tag = {}
+        self._by_mood = {}
+        self._trigram_index = defaultdict(dict)
+        self._search_text = {}
+        self._by_date = []
+        self._by_day = {}
+        self._seq = {}
+        self._next_seq = 0
+        for entry_id, entry in self.entries.items():
+            self._index_entry(entry_id, entry)
+        self._by_date.sort()
+    
+    def _index_entry(self, entry_id: str, entry: Dict[str, Any]):
+        # Entries with the same mood share one string object
+        if isinstance(entry.get('mood'), str):
+            entry['mood'] = sys.intern(entry['mood'])
+        if entry_id not in self._seq:
+            self._seq[entry_id] = self._next_seq
+            self._next_seq += 1
+        ordinal = _day_ordinal(entry.get('date'))
+        if ordinal is not None:
+            self._entry_days[ordinal] += 1
+        for tag in entry.get('tags') or []:
+            self._by_tag.setdefault(tag, {})[entry_id] = None
+        self._by_mood.setdefault(entry.get('mood'), {})[entry_id] = None
+        text = self._search_text[entry_id] = _search_text(entry)
+        for gram in trigrams(text):
+            self._trigram_index[gram][entry_id] = None
+        if isinstance(entry.get('date'), str):
+            insort(self._by_date, (entry['date'], self._seq[entry_id], entry_id))
+            self._by_day.setdefault(entry['date'][:10], {})[entry_id] = None
+    
+    def _unindex_entry(self, entry_id: str, entry: Dict[str, Any]):
+        ordinal = _day_ordinal(entry.get('date'))
+        if ordinal is not None:
+            self._entry_days[ordinal] -= 1
+            if not self._entry_days[ordinal]:
+                del self._entry_days[ordinal]
+        for tag in entry.get('tags') or []:
+            discard(self._by_tag, tag, entry_id)
+        discard(self._by_mood, entry.get('mood'), entry_id)
+        for gram in trigrams(self._search_text.pop(entry_id, '')):
+            discard(self._trigram_index, gram, entry_id)
+        if isinstance(entry.get('date'), str):
+            del self._by_date[bisect_left(self._by_date, (entry['date'], self._seq[entry_id], entry_id))]
+            discard(self._by_day, entry['date'][:10], entry_id)
+    
+    def _mark_dirty(self, collection: str, *keys: str, fields: List[str] = None):
+        with self._save_lock:
+            self._read_cache.clear()
+            super()._mark_dirty(collection, *keys, fields=fields)
+    
+    def _add_tags(self, tags: List[str]):
+        new_tags = [t for t in tags if t not in self.tags]
+        if new_tags:
+            self.tags.update(new_tags)
+            self._mark_dirty('tags', *new_tags)
     
     def _load_default_prompts(self):
         if not self.prompts:
@@ -61,32 +166,36 @@ class JournalSystem:
                 'reflection': 'What moment today made you pause and reflect?'
             }
     
+    @locked
     def create_entry(self, content: str, title: str = None, mood: str = None,
                     tags: List[str] = None, date: str = None) -> Optional[str]:
         if not self.enabled:
             return None
         
         try:
-            entry_id = str(uuid.uuid4())[:8]
-            entry_date = date or datetime.now().isoformat()
+            now = datetime.now()
+            now_iso = now.isoformat()
+            entry_id = secrets.token_hex(4)
+            entry_date = date or now_iso
             
             entry_tags = tags or []
-            self.tags.update(entry_tags)
+            self._add_tags(entry_tags)
             
             self.entries[entry_id] = {
                 'id': entry_id,
-                'title': title or f"Entry {datetime.now().strftime('%Y-%m-%d')}",
+                'title': title or f"Entry {now.strftime('%Y-%m-%d')}",
                 'content': content,
                 'mood': mood,
                 'tags': entry_tags,
                 'date': entry_date,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat(),
+                'created_at': now_iso,
+                'updated_at': now_iso,
                 'favorite': False,
                 'word_count': len(content.split())
             }
+            self._index_entry(entry_id, self.entries[entry_id])
             
-            self._save_data()
+            self._mark_dirty('entries', entry_id)
             logger.info(f"Created journal entry: {entry_id}")
             return entry_id
             
@@ -94,29 +203,44 @@ class JournalSystem:
             logger.error(f"Error creating journal entry: {e}")
             return None
     
+    @locked
     def update_entry(self, entry_id: str, content: str = None, title: str = None,
                     mood: str = None, tags: List[str] = None) -> bool:
         if not self.enabled or entry_id not in self.entries:
             return False
         
         try:
-            if content:
-                self.entries[entry_id]['content'] = content
-                self.entries[entry_id]['word_count'] = len(content.split())
+            entry = self.entries[entry_id]
+            self._unindex_entry(entry_id, entry)
+            try:
+                if content:
+                    entry['content'] = content
+                    entry['word_count'] = len(content.split())
+                
+                if title:
+                    entry['title'] = title
+                
+                if mood:
+                    entry['mood'] = mood
+                
+                if tags:
+                    entry['tags'] = tags
+                    self._add_tags(tags)
+            finally:
+                self._index_entry(entry_id, entry)
             
-            if title:
-                self.entries[entry_id]['title'] = title
+            self.entries[entry_id]['updated_at'] = datetime.now().isoformat()
             
+            fields = ['updated_at']
+            if content:
+                fields += ['content', 'word_count']
+            if title:
+                fields.append('title')
             if mood:
-                self.entries[entry_id]['mood'] = mood
-            
+                fields.append('mood')
             if tags:
-                self.entries[entry_id]['tags'] = tags
-                self.tags.update(tags)
-            
-            self.entries[entry_id]['updated_at'] = datetime.now().isoformat()
-            
-            self._save_data()
+                fields.append('tags')
+            self._mark_dirty('entries', entry_id, fields=fields)
             logger.info(f"Updated journal entry: {entry_id}")
             return True
             
@@ -124,21 +248,20 @@ class JournalSystem:
             logger.error(f"Error updating journal entry: {e}")
             return False
     
-    def get_entry(self, entry_id: str) -> Optional[Dict[str, Any]]:
+    def get_entry(self, entry_id: str) -> Optional[Mapping[str, Any]]:
         if not self.enabled or entry_id not in self.entries:
             return None
-        return self.entries[entry_id].copy()
+        return MappingProxyType(self.entries[entry_id])
     
-    def get_todays_entry(self) -> Optional[Dict[str, Any]]:
+    def get_todays_entry(self) -> Optional[Mapping[str, Any]]:
         if not self.enabled:
             return None
         
-        today = datetime.now().date().isoformat()
-        for entry in self.entries.values():
-            if entry['date'][:10] == today:
-                return entry.copy()
-        
-        return None
+        ids = self._by_day.get(datetime.now().date().isoformat())
+        if not ids:
+            return None
+        # The earliest-written entry wins when there are several for the day
+        return MappingProxyType(self.entries[min(ids, key=self._seq.__getitem__)])
     
     def search_entries(self, query: str = None, tag: str = None, mood: str = None,
                       start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
@@ -146,24 +269,37 @@ class JournalSystem:
             return []
         
         try:
-            results = list(self.entries.values())
-            
-            if query:
-                query_lower = query.lower()
-                results = [e for e in results if query_lower in e['content'].lower() 
-                          or query_lower in e['title'].lower()]
-            
+            query_lower = query.lower() if query else None
+            postings = []
+            if query_lower:
+                postings.extend(self._trigram_index.get(gram, {}) for gram in trigrams(query_lower))
             if tag:
-                results = [e for e in results if tag in e.get('tags', [])]
-            
+                postings.append(self._by_tag.get(tag, {}))
             if mood:
-                results = [e for e in results if e.get('mood') == mood]
+                postings.append(self._by_mood.get(mood, {}))
             
-            if start_date:
-                results = [e for e in results if e['date'] >= start_date]
+            if postings:
+                postings.sort(key=len)
+                candidate_ids = sorted((i for i in postings[0] if all(i in p for p in postings[1:])),
+                                       key=self._seq.__getitem__)
+            elif start_date or end_date:
+                # Only a date range: slice it straight out of the date-sorted list
+                lo = bisect_left(self._by_date, (start_date,)) if start_date else 0
+                hi = bisect_right(self._by_date, (end_date, float('inf'))) if end_date else len(self._by_date)
+                candidate_ids = [entry_id for _, _, entry_id in self._by_date[lo:hi]]
+            else:
+                candidate_ids = self.entries
             
-            if end_date:
-                results = [e for e in results if e['date'] <= end_date]
+            results = []
+            for entry_id in candidate_ids:
+                entry = self.entries[entry_id]
+                if query_lower and query_lower not in self._search_text[entry_id]:
+                    continue
+                if start_date and entry['date'] < start_date:
+                    continue
+                if end_date and entry['date'] > end_date:
+                    continue
+                results.append(entry)
             
             return sorted(results, key=lambda x: x['date'], reverse=True)
             
@@ -171,26 +307,29 @@ class JournalSystem:
             logger.error(f"Error searching entries: {e}")
             return []
     
+    @locked
     def toggle_favorite(self, entry_id: str) -> bool:
         if not self.enabled or entry_id not in self.entries:
             return False
         
         try:
             self.entries[entry_id]['favorite'] = not self.entries[entry_id]['favorite']
-            self._save_data()
+            self._mark_dirty('entries', entry_id, fields=['favorite'])
             return True
             
         except Exception as e:
             logger.error(f"Error toggling favorite: {e}")
             return False
     
+    @locked
     def delete_entry(self, entry_id: str) -> bool:
         if not self.enabled or entry_id not in self.entries:
             return False
         
         try:
-            del self.entries[entry_id]
-            self._save_data()
+            self._unindex_entry(entry_id, self.entries.pop(entry_id))
+            del self._seq[entry_id]
+            self._mark_dirty('entries', entry_id)
             logger.info(f"Deleted journal entry: {entry_id}")
             return True
             
@@ -205,16 +344,19 @@ class JournalSystem:
         if prompt_type and prompt_type in self.prompts:
             return self.prompts[prompt_type]
         
-        import random
-        return random.choice(list(self.prompts.values()))
+        if self._prompt_choices is None:
+            self._prompt_choices = tuple(self.prompts.values())
+        return random.choice(self._prompt_choices)
     
+    @locked
     def add_custom_prompt(self, name: str, prompt: str) -> bool:
         if not self.enabled:
             return False
         
         try:
             self.prompts[name] = prompt
-            self._save_data()
+            self._prompt_choices = None
+            self._mark_dirty('prompts', name)
             logger.info(f"Added custom prompt: {name}")
             return True
             
@@ -226,72 +368,66 @@ class JournalSystem:
         if not self.enabled or not self.entries:
             return 0
         
-        try:
-            dates = sorted(set(e['date'][:10] for e in self.entries.values()), reverse=True)
-            
-            if not dates:
-                return 0
-            
-            today = datetime.now().date()
-            current_date = today
-            streak = 0
-            
-            for date_str in dates:
-                date = datetime.fromisoformat(date_str).date()
-                
-                if date == current_date:
-                    streak += 1
-                    current_date -= timedelta(days=1)
-                elif date < current_date:
-                    break
-            
-            return streak
-            
-        except Exception as e:
-            logger.error(f"Error calculating streak: {e}")
-            return 0
+        # Walk back from today one day at a time; entries dated in the future don't count
+        day = datetime.now().date().toordinal()
+        streak = 0
+        while day in self._entry_days:
+            streak += 1
+            day -= 1
+        
+        return streak
     
     def get_analytics(self, days: int = 30) -> Optional[Dict[str, Any]]:
         if not self.enabled:
             return None
         
         try:
-            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-            recent = [e for e in self.entries.values() if e['date'] >= cutoff]
+            now = datetime.now()
+            cutoff = (now - timedelta(days=days)).isoformat()
+            key = ('get_analytics', days, now.date().toordinal())
+            cached = self._read_cache.get(key)
+            # A cached result holds until the cutoff passes the oldest entry it counted
+            if cached is not None:
+                cached_cutoff, oldest, result = cached
+                if cached_cutoff <= cutoff and (oldest is None or cutoff <= oldest):
+                    return copy_result(result)
             
-            total_words = sum(e['word_count'] for e in recent)
+            recent = [e for e in self.entries.values() if e['date'] >= cutoff]
             
-            mood_counts = defaultdict(int)
+            total_words = 0
+            favorite_count = 0
+            oldest = None
+            mood_counts = Counter()
+            tag_counts = Counter()
             for e in recent:
+                total_words += e['word_count']
+                if oldest is None or e['date'] < oldest:
+                    oldest = e['date']
                 if e.get('mood'):
                     mood_counts[e['mood']] += 1
+                tag_counts.update(e.get('tags', []))
+                if e['favorite']:
+                    favorite_count += 1
             
-            tag_counts = defaultdict(int)
-            for e in recent:
-                for tag in e.get('tags', []):
-                    tag_counts[tag] += 1
-            
-            daily_counts = defaultdict(int)
-            for e in recent:
-                date = e['date'][:10]
-                daily_counts[date] += 1
-            
-            return {
+            result = {
                 'period_days': days,
                 'total_entries': len(recent),
                 'total_words': total_words,
                 'avg_words_per_entry': total_words / len(recent) if recent else 0,
                 'current_streak': self.get_streak(),
                 'mood_distribution': dict(mood_counts),
-                'top_tags': dict(sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
+                'top_tags': dict(tag_counts.most_common(10)),
                 'entries_per_day': len(recent) / days,
-                'favorite_count': len([e for e in recent if e['favorite']])
+                'favorite_count': favorite_count
             }
+            cache_result(self._read_cache, key, (cutoff, oldest, result))
+            return copy_result(result)
             
         except Exception as e:
             logger.error(f"Error getting analytics: {e}")
             return None
     
+    @memoized
     def get_stats(self) -> Dict[str, Any]:
         return {
             'enabled': self.enabled,
@@ -301,28 +437,27 @@ class JournalSystem:
             'favorite_count': len([e for e in self.entries.values() if e['favorite']])
         }
 
-    def get_recent_entries(self, count: int = 10) -> List[Dict[str, Any]]:
-        entries_list = []
-        for entry_id, entry in self.entries.items():
-            entry_copy = entry.copy()
-            entry_copy['id'] = entry_id
-            entries_list.append(entry_copy)
-        return sorted(entries_list, key=lambda x: x.get('timestamp', ''), reverse=True)[:count]
+    def get_recent_entries(self, count: int = 10) -> List[Mapping[str, Any]]:
+        # Entries have no 'timestamp'; newest first by creation time
+        newest = heapq.nlargest(count, self.entries.values(), key=lambda e: e.get('created_at', ''))
+        return [MappingProxyType(entry) for entry in newest]
 
 
 
     def add_entry(self, content: str, mood: str = None, title: str = None, **kwargs):
         entry_id = self.create_entry(content, mood=mood, title=title, **kwargs)
         if entry_id:
-            return self.entries[entry_id].copy()
+            return MappingProxyType(self.entries[entry_id])
         return None
 
+    @locked
     def remove_entry(self, entry_id: str) -> bool:
         if not self.enabled or entry_id not in self.entries:
             return False
         try:
-            del self.entries[entry_id]
-            self._save_data()
+            self._unindex_entry(entry_id, self.entries.pop(entry_id))
+            del self._seq[entry_id]
+            self._mark_dirty('entries', entry_id)
             return True
         except:
             return False
@@ -1,61 +1,134 @@
+import atexit
 import logging
 import json
 import os
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from collections import defaultdict
 
+from ..tracker_base import dumps, loads, locked, read_file, write_file
+
 logger = logging.getLogger(__name__)
 
+
 class KnowledgeGraphManager:
     def __init__(self, config: dict):
         self.config = config
         self.enabled = config.get('enabled', True)
         self.storage_path = config.get('storage_path', 'data/knowledge_graph.json')
+        self.save_interval = config.get('save_interval', 2.0)
         
         self.entities = {}
         self.relationships = []
         self.entity_types = set()
         self.relationship_types = set()
         
+        # Relationship dicts per entity id, each list in self.relationships order:
+        # outgoing, incoming, and every edge touching the entity (self-loops once)
+        self._out_adj: Dict[str, List[Dict[str, Any]]] = {}
+        self._in_adj: Dict[str, List[Dict[str, Any]]] = {}
+        self._incident: Dict[str, List[Dict[str, Any]]] = {}
+        # Lowercased name -> entity ids (dict keys, in self.entities order); several
+        # entities of different types can share a name
+        self._ids_by_name: Dict[str, Dict[str, None]] = {}
+        
+        self._dirty = False
+        self._save_timer = None
+        self._save_lock = threading.RLock()
+        
         if self.enabled:
             self._load_graph()
+            self._rebuild_indexes()
+            atexit.register(self.flush)
         
         logger.info("KnowledgeGraphManager initialized")
     
     def _load_graph(self):
         try:
             if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.entities = data.get('entities', {})
-                    self.relationships = data.get('relationships', [])
-                    self.entity_types = set(data.get('entity_types', []))
-                    self.relationship_types = set(data.get('relationship_types', []))
+                data = loads(read_file(self.storage_path))
+                self.entities = data.get('entities', {})
+                self.relationships = data.get('relationships', [])
+                self.entity_types = set(data.get('entity_types', []))
+                self.relationship_types = set(data.get('relationship_types', []))
                 logger.info(f"Loaded {len(self.entities)} entities and {len(self.relationships)} relationships")
         except Exception as e:
             logger.error(f"Error loading knowledge graph: {e}")
     
+    def _rebuild_indexes(self):
+        self._out_adj = {}
+        self._in_adj = {}
+        self._incident = {}
+        self._ids_by_name = {}
+        for rel in self.relationships:
+            self._index_relationship(rel)
+        for entity_id, entity in self.entities.items():
+            self._index_name(entity_id, entity['name'])
+    
+    def _index_name(self, entity_id: str, name: str):
+        if isinstance(name, str):
+            self._ids_by_name.setdefault(name.lower(), {})[entity_id] = None
+    
+    def _unindex_name(self, entity_id: str, name: str):
+        if isinstance(name, str):
+            ids = self._ids_by_name.get(name.lower())
+            if ids is not None:
+                ids.pop(entity_id, None)
+                if not ids:
+                    del self._ids_by_name[name.lower()]
+    
+    def _index_relationship(self, rel: Dict[str, Any]):
+        self._out_adj.setdefault(rel['from'], []).append(rel)
+        self._in_adj.setdefault(rel['to'], []).append(rel)
+        self._incident.setdefault(rel['from'], []).append(rel)
+        if rel['to'] != rel['from']:
+            self._incident.setdefault(rel['to'], []).append(rel)
+    
     def _save_graph(self):
-        try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump({
+        with self._save_lock:
+            try:
+                data = dumps({
                     'entities': self.entities,
                     'relationships': self.relationships,
                     'entity_types': list(self.entity_types),
                     'relationship_types': list(self.relationship_types),
                     'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving knowledge graph: {e}")
+                })
+                write_file(self.storage_path, data)
+                self._dirty = False
+            except Exception as e:
+                logger.error(f"Error saving knowledge graph: {e}")
     
+    def _mark_dirty(self):
+        """Coalesce mutations within save_interval seconds into a single graph write."""
+        with self._save_lock:
+            self._dirty = True
+            
+            if self.save_interval <= 0:
+                self._save_graph()
+            elif self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_interval, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def flush(self):
+        """Write pending changes to disk immediately."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._save_graph()
+    
+    @locked
     def add_entity(self, name: str, entity_type: str, properties: Dict[str, Any] = None) -> bool:
         if not self.enabled:
             return False
         
         try:
             entity_id = self._generate_entity_id(name, entity_type)
+            previous = self.entities.get(entity_id)
             
             self.entities[entity_id] = {
                 'id': entity_id,
@@ -66,8 +139,18 @@ class KnowledgeGraphManager:
                 'updated_at': datetime.now().isoformat()
             }
             
+            if previous is None:
+                self._index_name(entity_id, name)
+            elif previous['name'] != name:
+                # A colliding id keeps its old slot, so restore entity order in the new bucket
+                self._unindex_name(entity_id, previous['name'])
+                self._index_name(entity_id, name)
+                if isinstance(name, str):
+                    ids = self._ids_by_name[name.lower()]
+                    self._ids_by_name[name.lower()] = {i: None for i in self.entities if i in ids}
+            
             self.entity_types.add(entity_type)
-            self._save_graph()
+            self._mark_dirty()
             
             logger.info(f"Added entity: {name} ({entity_type})")
             return True
@@ -76,6 +159,7 @@ class KnowledgeGraphManager:
             logger.error(f"Error adding entity: {e}")
             return False
     
+    @locked
     def add_relationship(self, from_entity: str, relationship_type: str, to_entity: str, properties: Dict[str, Any] = None) -> bool:
         if not self.enabled:
             return False
@@ -97,8 +181,9 @@ class KnowledgeGraphManager:
             }
             
             self.relationships.append(relationship)
+            self._index_relationship(relationship)
             self.relationship_types.add(relationship_type)
-            self._save_graph()
+            self._mark_dirty()
             
             logger.info(f"Added relationship: {from_entity} -{relationship_type}-> {to_entity}")
             return True
@@ -112,13 +197,8 @@ class KnowledgeGraphManager:
         return base_id
     
     def _find_entity_id(self, name: str) -> Optional[str]:
-        name_lower = name.lower()
-        
-        for entity_id, entity in self.entities.items():
-            if entity['name'].lower() == name_lower:
-                return entity_id
-        
-        return None
+        ids = self._ids_by_name.get(name.lower())
+        return next(iter(ids)) if ids else None
     
     def get_entity(self, name: str) -> Optional[Dict[str, Any]]:
         if not self.enabled:
@@ -138,9 +218,18 @@ class KnowledgeGraphManager:
         if not entity_id:
             return []
         
+        if direction == 'both':
+            candidates = self._incident.get(entity_id, ())
+        elif direction == 'from':
+            candidates = self._out_adj.get(entity_id, ())
+        elif direction == 'to':
+            candidates = self._in_adj.get(entity_id, ())
+        else:
+            candidates = ()
+        
         results = []
         
-        for rel in self.relationships:
+        for rel in candidates:
             if direction in ['from', 'both'] and rel['from'] == entity_id:
                 to_entity = self.entities.get(rel['to'], {})
                 results.append({
@@ -173,36 +262,72 @@ class KnowledgeGraphManager:
         if not from_id or not to_id:
             return None
         
-        visited = set()
-        queue = [(from_id, [])]
+        # Paths are only reported while shorter than max_depth
+        max_length = max_depth - 1
+        if max_length < 0:
+            return None
+        if from_id == to_id:
+            return []
         
-        while queue:
-            current_id, path = queue.pop(0)
-            
-            if len(path) >= max_depth:
-                continue
-            
-            if current_id == to_id:
-                return path
+        # Search from both ends, always widening the smaller frontier by one level.
+        # Each side maps a reached entity to the (entity, relationship) it was
+        # reached through, so an entity is queued at most once per side.
+        forward = {from_id: None}
+        backward = {to_id: None}
+        forward_frontier = [from_id]
+        backward_frontier = [to_id]
+        length = 0
+        
+        while forward_frontier and backward_frontier and length < max_length:
+            expand_forward = len(forward_frontier) <= len(backward_frontier)
+            if expand_forward:
+                frontier, reached, other, adjacency, end = forward_frontier, forward, backward, self._out_adj, 'to'
+            else:
+                frontier, reached, other, adjacency, end = backward_frontier, backward, forward, self._in_adj, 'from'
             
-            if current_id in visited:
-                continue
+            next_frontier = []
+            for node_id in frontier:
+                for rel in adjacency.get(node_id, ()):
+                    next_id = rel[end]
+                    if next_id in reached:
+                        continue
+                    reached[next_id] = (node_id, rel)
+                    # Nothing shorter was found on earlier levels, so the first meeting is a shortest path
+                    if next_id in other:
+                        return self._build_path(forward, backward, next_id)
+                    next_frontier.append(next_id)
             
-            visited.add(current_id)
-            
-            for rel in self.relationships:
-                if rel['from'] == current_id:
-                    next_id = rel['to']
-                    next_entity = self.entities.get(next_id, {})
-                    new_path = path + [{
-                        'from': self.entities[current_id]['name'],
-                        'type': rel['type'],
-                        'to': next_entity.get('name')
-                    }]
-                    queue.append((next_id, new_path))
+            if expand_forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+            length += 1
         
         return None
     
+    def _edge(self, from_id: str, rel: Dict[str, Any], to_id: str) -> Dict[str, Any]:
+        return {
+            'from': self.entities[from_id]['name'],
+            'type': rel['type'],
+            'to': self.entities.get(to_id, {}).get('name')
+        }
+    
+    def _build_path(self, forward: Dict[str, Any], backward: Dict[str, Any], meet_id: str) -> List[Dict[str, Any]]:
+        path = []
+        node_id = meet_id
+        while forward[node_id] is not None:
+            prev_id, rel = forward[node_id]
+            path.append(self._edge(prev_id, rel, node_id))
+            node_id = prev_id
+        path.reverse()
+        
+        node_id = meet_id
+        while backward[node_id] is not None:
+            next_id, rel = backward[node_id]
+            path.append(self._edge(node_id, rel, next_id))
+            node_id = next_id
+        return path
+    
     def query_by_type(self, entity_type: str) -> List[Dict[str, Any]]:
         if not self.enabled:
             return []
@@ -270,6 +395,7 @@ class KnowledgeGraphManager:
         
         return context
     
+    @locked
     def delete_entity(self, name: str) -> bool:
         if not self.enabled:
             return False
@@ -278,14 +404,25 @@ class KnowledgeGraphManager:
         if not entity_id:
             return False
         
-        del self.entities[entity_id]
+        self._unindex_name(entity_id, self.entities.pop(entity_id)['name'])
         
-        self.relationships = [
-            rel for rel in self.relationships
-            if rel['from'] != entity_id and rel['to'] != entity_id
-        ]
-        
-        self._save_graph()
+        self._out_adj.pop(entity_id, None)
+        self._in_adj.pop(entity_id, None)
+        removed = self._incident.pop(entity_id, None)
+        if removed:
+            def keep(rel):
+                return rel['from'] != entity_id and rel['to'] != entity_id
+            
+            # Only the other endpoints of the dropped edges need their lists trimmed
+            for neighbor_id in {rel['from'] for rel in removed} | {rel['to'] for rel in removed}:
+                for index in (self._out_adj, self._in_adj, self._incident):
+                    if neighbor_id in index:
+                        index[neighbor_id] = [rel for rel in index[neighbor_id] if keep(rel)]
+                        if not index[neighbor_id]:
+                            del index[neighbor_id]
+            self.relationships = [rel for rel in self.relationships if keep(rel)]
+        
+        self._mark_dirty()
         return True
     
     def get_stats(self) -> Dict[str, Any]:
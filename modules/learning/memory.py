@@ -1,91 +1,125 @@
+import atexit
 import json
 import logging
 import os
+import threading
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from collections import defaultdict
 
+from ..tracker_base import dumps, loads, locked, read_file, write_file
+
 logger = logging.getLogger(__name__)
 
+
 class Memory:
     def __init__(self, config: dict):
         self.config = config
         self.memory_file = config.get('memory_file', 'data/memory.json')
         self.conversation_file = config.get('conversation_history', 'data/conversations.json')
         self.max_history = config.get('max_history', 1000)
+        self.save_interval = config.get('save_interval', 2.0)
         
         self.memory = {}
         self.conversations = []
         self.user_preferences = {}
         self.learned_patterns = defaultdict(int)
         
+        self._dirty = False
+        self._conversations_dirty = False
+        self._save_timer = None
+        self._save_lock = threading.RLock()
+        
         self._load_memory()
         self._load_conversations()
+        atexit.register(self.flush)
         
         logger.info("Memory initialized")
     
     def _load_memory(self):
         try:
             if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r') as f:
-                    content = f.read().strip()
-                    if content:
-                        data = json.loads(content)
-                        self.memory = data.get('memory', {})
-                        self.user_preferences = data.get('preferences', {})
-                        self.learned_patterns = defaultdict(int, data.get('patterns', {}))
-                        logger.info("Memory loaded from storage")
+                content = read_file(self.memory_file).strip()
+                if content:
+                    data = loads(content)
+                    self.memory = data.get('memory', {})
+                    self.user_preferences = data.get('preferences', {})
+                    self.learned_patterns = defaultdict(int, data.get('patterns', {}))
+                    logger.info("Memory loaded from storage")
         except json.JSONDecodeError as e:
             logger.warning(f"Invalid JSON in memory file: {e}. Starting with empty memory.")
         except Exception as e:
             logger.error(f"Error loading memory: {e}")
     
     def _save_memory(self):
-        try:
-            os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-            with open(self.memory_file, 'w') as f:
-                json.dump({
+        with self._save_lock:
+            try:
+                data = dumps({
                     'memory': self.memory,
                     'preferences': self.user_preferences,
                     'patterns': dict(self.learned_patterns),
                     'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-            logger.debug("Memory saved")
-        except Exception as e:
-            logger.error(f"Error saving memory: {e}")
+                })
+                write_file(self.memory_file, data)
+                self._dirty = False
+                logger.debug("Memory saved")
+            except Exception as e:
+                logger.error(f"Error saving memory: {e}")
     
     def _load_conversations(self):
         try:
             if os.path.exists(self.conversation_file):
-                with open(self.conversation_file, 'r') as f:
-                    content = f.read().strip()
-                    if content:
-                        self.conversations = json.loads(content)
-                        logger.info(f"Loaded {len(self.conversations)} conversations")
+                content = read_file(self.conversation_file).strip()
+                if content:
+                    self.conversations = loads(content)
+                    logger.info(f"Loaded {len(self.conversations)} conversations")
         except json.JSONDecodeError as e:
             logger.warning(f"Invalid JSON in conversations file: {e}. Starting with empty history.")
         except Exception as e:
             logger.error(f"Error loading conversations: {e}")
     
     def _save_conversations(self):
-        try:
-            os.makedirs(os.path.dirname(self.conversation_file), exist_ok=True)
-            
-            if len(self.conversations) > self.max_history:
-                self.conversations = self.conversations[-self.max_history:]
+        with self._save_lock:
+            try:
+                write_file(self.conversation_file, dumps(self.conversations))
+                self._conversations_dirty = False
+                logger.debug("Conversations saved")
+            except Exception as e:
+                logger.error(f"Error saving conversations: {e}")
+    
+    def _mark_dirty(self, conversations: bool = False):
+        """Coalesce mutations within save_interval seconds into a single write per file."""
+        with self._save_lock:
+            if conversations:
+                self._conversations_dirty = True
+            else:
+                self._dirty = True
             
-            with open(self.conversation_file, 'w') as f:
-                json.dump(self.conversations, f, indent=2)
-            logger.debug("Conversations saved")
-        except Exception as e:
-            logger.error(f"Error saving conversations: {e}")
-    
+            if self.save_interval <= 0:
+                self.flush()
+            elif self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_interval, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def flush(self):
+        """Write pending changes to disk immediately."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._save_memory()
+            if self._conversations_dirty:
+                self._save_conversations()
+    
+    @locked
     def remember(self, key: str, value: Any):
         self.memory[key] = {
             'value': value,
             'timestamp': datetime.now().isoformat()
         }
-        self._save_memory()
+        self._mark_dirty()
         logger.info(f"Remembered: {key}")
     
     def recall(self, key: str) -> Optional[Any]:
@@ -93,14 +127,16 @@ class Memory:
             return self.memory[key]['value']
         return None
     
+    @locked
     def forget(self, key: str) -> bool:
         if key in self.memory:
             del self.memory[key]
-            self._save_memory()
+            self._mark_dirty()
             logger.info(f"Forgot: {key}")
             return True
         return False
     
+    @locked
     def add_conversation(self, user_input: str, assistant_response: str, metadata: Dict = None):
         conversation = {
             'timestamp': datetime.now().isoformat(),
@@ -110,7 +146,9 @@ class Memory:
         }
         
         self.conversations.append(conversation)
-        self._save_conversations()
+        if len(self.conversations) > self.max_history:
+            self.conversations = self.conversations[-self.max_history:]
+        self._mark_dirty(conversations=True)
     
     def get_recent_conversations(self, limit: int = 10) -> List[Dict]:
         return self.conversations[-limit:]
@@ -123,17 +161,19 @@ class Memory:
                query_lower in conv['assistant'].lower()
         ]
     
+    @locked
     def set_preference(self, key: str, value: Any):
         self.user_preferences[key] = value
-        self._save_memory()
+        self._mark_dirty()
         logger.info(f"Set preference: {key} = {value}")
     
     def get_preference(self, key: str, default: Any = None) -> Any:
         return self.user_preferences.get(key, default)
     
+    @locked
     def learn_pattern(self, pattern: str):
         self.learned_patterns[pattern] += 1
-        self._save_memory()
+        self._mark_dirty()
     
     def get_pattern_frequency(self, pattern: str) -> int:
         return self.learned_patterns.get(pattern, 0)
@@ -0,0 +1,421 @@
+"""Persistence and method helpers shared by the tracker modules."""
+import logging
+import gzip
+import json
+import os
+import mmap
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Set
+from functools import wraps
+from datetime import date, datetime
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+def dumps(obj) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def dump_record(record) -> bytes:
+    return dumps(record) + b'\n'
+
+
+def loads(data):
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def fsync_directory(directory: str):
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def atomic_write(path: str, data: bytes):
+    """Replace path in one rename so a crash never leaves a half-written file."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Without this the rename itself can be lost, leaving the old file in place
+    fsync_directory(directory)
+
+
+def read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        data = f.read()
+    return gzip.decompress(data) if path.endswith('.gz') else data
+
+
+def write_file(path: str, data: bytes):
+    """Atomically write data to path, gzipped when the name ends in .gz."""
+    atomic_write(path, gzip.compress(data) if path.endswith('.gz') else data)
+
+
+@contextmanager
+def mapped(path: str):
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            yield memoryview(b'')
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            yield view
+
+
+def discard(index: Dict[Any, Dict[str, None]], key: Any, item_id: str):
+    ids = index.get(key)
+    if ids is not None:
+        ids.pop(item_id, None)
+        if not ids:
+            del index[key]
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def clamp_rating(rating: int) -> int:
+    return rating if 1 <= rating <= 10 else (1 if rating < 1 else 10)
+
+
+_CACHE_SIZE = 64
+
+
+def copy_result(value):
+    # Nested lists and dicts are copied too, so callers never edit a cached result
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+    return value
+
+
+def cache_result(cache: Dict[tuple, Any], key: tuple, result):
+    """Store result under key, evicting the oldest entry once the cache is full."""
+    if len(cache) >= _CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = result
+    return result
+
+
+def memoized(method):
+    """Cache a read method's result in self._read_cache until the next mutation or day change."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())), date.today().toordinal())
+        # Mutators clear the cache under the same lock, so a result computed
+        # before a mutation can never be stored after it
+        with self._save_lock:
+            result = self._read_cache.get(key)
+            if result is None:
+                result = cache_result(self._read_cache, key, method(self, *args, **kwargs))
+        return copy_result(result)
+    return wrapper
+
+
+def locked(method):
+    """Run a mutator under self._save_lock so a timed flush never sees it half-applied."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._save_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def safe(default, action: str):
+    """Log and swallow errors from a public method, returning default instead."""
+    def decorator(fn):
+        fn_logger = logging.getLogger(fn.__module__)
+        
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return fn(self, *args, **kwargs)
+            except Exception as e:
+                fn_logger.error(f"Error {action}: {e}")
+                return default() if callable(default) else default
+        return wrapper
+    return decorator
+
+
+def disable_methods(tracker, results: Dict[str, Any]):
+    """Replace each named method with a stub returning its disabled-state result."""
+    for name, result in results.items():
+        setattr(tracker, name, _stub(result))
+
+
+def _stub(result):
+    if callable(result):
+        return lambda *args, **kwargs: result()
+    return lambda *args, **kwargs: result
+
+
+class LogStore:
+    """Mixin keeping a tracker's collections in a snapshot plus an append-only log.
+    
+    Each log line holds one record's full value ('v') or just its changed fields
+    ('p'), and is replayed over the snapshot on load; once the log outgrows
+    compact_ratio of the snapshot it is folded into a fresh one. Subclasses name
+    their dict collections in _collections (sets also go in _set_collections and
+    are logged as membership flags), call _init_store from __init__, and
+    implement _apply_snapshot and _snapshot_payload.
+    
+    Changes that are not idempotent go through _log_event instead: each event
+    is numbered, and replay skips numbers at or below the _log_seq restored
+    from the snapshot, so a log left behind by an interrupted compaction is
+    never applied twice. Stores using events persist _log_seq in their
+    snapshot and implement _apply_event.
+    """
+    _collections: tuple = ()
+    _set_collections: tuple = ()
+    
+    def _init_store(self, config: dict, name: str, save_interval: float):
+        self._store_name = name
+        self._store_logger = logging.getLogger(type(self).__module__)
+        self.storage_format = config.get('storage_format', 'json')
+        if self.storage_format == 'msgpack' and not MSGPACK_AVAILABLE:
+            self._store_logger.warning(f"msgpack not installed - falling back to JSON {name} storage")
+            self.storage_format = 'json'
+        default_path = f'data/{name}.msgpack' if self.storage_format == 'msgpack' else f'data/{name}.json'
+        self.storage_path = config.get('storage_path', default_path)
+        self.log_path = config.get('log_path', self.storage_path + '.log')
+        self.compact_ratio = config.get('compact_ratio', 0.5)
+        self.save_interval = config.get('save_interval', save_interval)
+        
+        # (collection, key) pairs changed since the last log append, each with the
+        # set of fields touched, or None when the whole record has to be written
+        self._pending: Dict[tuple, Optional[Set[str]]] = {}
+        self._events: List[bytes] = []
+        self._log_seq = 0
+        self._snapshot_due = False
+        self._save_timer = None
+        self._save_lock = threading.RLock()
+    
+    def _apply_snapshot(self, data: Dict[str, Any]):
+        raise NotImplementedError
+    
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        raise NotImplementedError
+    
+    def _apply_event(self, record: Dict[str, Any]):
+        raise NotImplementedError
+    
+    def _before_replay(self):
+        """Hook run between reading the snapshot and replaying the log."""
+    
+    def _load_store(self) -> bool:
+        """Read the snapshot and replay the log; True if either one held data."""
+        legacy_path = os.path.splitext(self.storage_path)[0] + '.json'
+        if (self.storage_format == 'msgpack' and not os.path.exists(self.storage_path)
+                and os.path.exists(legacy_path)):
+            self._migrate_from_json(legacy_path)
+            loaded = True
+        else:
+            loaded = os.path.exists(self.storage_path)
+            if loaded:
+                self._apply_snapshot(self._read_snapshot(self.storage_path, self.storage_format))
+            self._before_replay()
+        return bool(self._replay_log(self.log_path)) or loaded
+    
+    def _read_snapshot(self, path: str, storage_format: str) -> Dict[str, Any]:
+        # Parse straight from the page cache rather than a bytes copy of the file
+        with mapped(path) as buf:
+            if storage_format == 'msgpack':
+                return msgpack.unpackb(buf, raw=False, strict_map_key=False)
+            return loads(buf)
+    
+    def _encode_snapshot(self, payload: dict) -> bytes:
+        if self.storage_format == 'msgpack':
+            return msgpack.packb(payload, use_bin_type=True)
+        return dumps(payload)
+    
+    def _migrate_from_json(self, legacy_path: str):
+        self._apply_snapshot(self._read_snapshot(legacy_path, 'json'))
+        self._before_replay()
+        self._replay_log(legacy_path + '.log')
+        self._save_data()
+        
+        if os.path.exists(self.storage_path):
+            for path in (legacy_path, legacy_path + '.log'):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._store_logger.info(f"Migrated {self._store_name} from {legacy_path} to {self.storage_path}")
+    
+    def _replay_log(self, log_path: str) -> int:
+        """Apply records appended since the last snapshot: full values, field patches or events."""
+        if not os.path.exists(log_path):
+            return 0
+        
+        replayed = 0
+        offset = 0
+        # Read one record at a time so replay never holds the whole log in memory
+        with open(log_path, 'rb+') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = loads(line)
+                    if 's' in record:
+                        if record['s'] > self._log_seq:
+                            self._log_seq = record['s']
+                            self._apply_event(record)
+                    elif record['c'] not in self._collections:
+                        break
+                    elif 'p' in record:
+                        # Patches always follow a full record for the same key
+                        target = getattr(self, record['c']).get(record['k'])
+                        if target is not None:
+                            target.update(record['p'])
+                    else:
+                        self._apply_record(record['c'], record['k'], record['v'])
+                except (ValueError, KeyError, TypeError):
+                    break
+                offset += len(line)
+                replayed += 1
+            
+            if f.seek(0, os.SEEK_END) > offset:
+                self._store_logger.warning(f"Truncating torn record at end of {self._store_name} log")
+                f.truncate(offset)
+        
+        return replayed
+    
+    def _apply_record(self, collection: str, key: str, value):
+        if collection in self._set_collections:
+            if value:
+                getattr(self, collection).add(key)
+            else:
+                getattr(self, collection).discard(key)
+        elif value is None:
+            getattr(self, collection).pop(key, None)
+        else:
+            getattr(self, collection)[key] = value
+    
+    def _mark_dirty(self, collection: str, *keys: str, fields: List[str] = None):
+        """Coalesce mutations within save_interval seconds into a single log append."""
+        with self._save_lock:
+            for key in keys:
+                pending_key = (collection, key)
+                if fields is None:
+                    self._pending[pending_key] = None
+                elif pending_key not in self._pending:
+                    self._pending[pending_key] = set(fields)
+                elif self._pending[pending_key] is not None:
+                    self._pending[pending_key].update(fields)
+            self._schedule_save()
+    
+    def _log_event(self, record: Dict[str, Any]):
+        """Number record and append it to the log with the next save."""
+        with self._save_lock:
+            self._log_seq += 1
+            self._events.append(dump_record({**record, 's': self._log_seq}))
+            self._schedule_save()
+    
+    def _mark_snapshot(self):
+        """Write a full snapshot with the next save instead of appending to the log."""
+        with self._save_lock:
+            self._snapshot_due = True
+            self._schedule_save()
+    
+    def _schedule_save(self):
+        if self.save_interval <= 0:
+            self._append_pending()
+        elif self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_interval, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write pending changes to disk immediately."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._pending or self._events or self._snapshot_due:
+                self._append_pending()
+    
+    def compact(self):
+        """Fold pending changes and the log into a fresh snapshot now."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._save_data()
+    
+    def _log_record(self, collection: str, key: str, fields: Optional[Set[str]]) -> Dict[str, Any]:
+        if collection in self._set_collections:
+            return {'c': collection, 'k': key, 'v': key in getattr(self, collection)}
+        value = getattr(self, collection).get(key)
+        if fields is None or value is None:
+            return {'c': collection, 'k': key, 'v': value}
+        return {'c': collection, 'k': key, 'p': {f: value[f] for f in fields if f in value}}
+    
+    def _append_pending(self):
+        """Log each changed record, or just its changed fields, instead of rewriting the snapshot."""
+        with self._save_lock:
+            if self._snapshot_due:
+                self._save_data()
+                return
+            try:
+                lines = [
+                    dump_record(self._log_record(collection, key, fields))
+                    for (collection, key), fields in self._pending.items()
+                ]
+                with open(self.log_path, 'ab') as f:
+                    f.write(b''.join(lines + self._events))
+                    # One fsync per batch, so a batch the caller saw saved survives a crash
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._pending.clear()
+                self._events.clear()
+                if self._log_size() > self._snapshot_size() * self.compact_ratio:
+                    self._save_data()
+            except Exception as e:
+                self._store_logger.error(f"Error saving {self._store_name} data: {e}")
+    
+    def _log_size(self) -> int:
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+    
+    def _snapshot_size(self) -> int:
+        try:
+            return os.path.getsize(self.storage_path)
+        except OSError:
+            return 0
+    
+    def _save_data(self):
+        """Write a full snapshot and truncate the log it supersedes."""
+        try:
+            # The rename reaches disk before the log it supersedes is dropped
+            atomic_write(self.storage_path, self._encode_snapshot({
+                **self._snapshot_payload(),
+                'last_updated': datetime.now().isoformat()
+            }))
+            open(self.log_path, 'w').close()
+            # The snapshot already holds every pending change
+            self._pending.clear()
+            self._events.clear()
+            self._snapshot_due = False
+        except Exception as e:
+            self._store_logger.error(f"Error saving {self._store_name} data: {e}")
@@ -1,6 +1,7 @@
 import pytest
 import os
 import sys
+import threading
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -40,3 +41,44 @@ def mock_env(monkeypatch):
     monkeypatch.setenv('OPENAI_API_KEY', 'test-key-123')
     monkeypatch.setenv('DATABASE_PATH', ':memory:')
     monkeypatch.setenv('TESTING', '1')
+
+@pytest.fixture
+def store_config(tmp_path):
+    """Build tracker configs over files in tmp_path with synchronous saves.
+    
+    Every call names the same files, so a tracker built from a second
+    config reloads what the first one wrote.
+    """
+    def config(**overrides):
+        return {'storage_path': str(tmp_path / 'store.json'), 'save_interval': 0, **overrides}
+    return config
+
+@pytest.fixture
+def assert_waits_for_flush():
+    """Check that mutate() leaves observe() untouched while a flush holds the save lock."""
+    def check(tracker, mutate, observe):
+        holding = threading.Event()
+        release = threading.Event()
+        
+        def flush():
+            with tracker._save_lock:
+                holding.set()
+                release.wait()
+        
+        flusher = threading.Thread(target=flush)
+        flusher.start()
+        holding.wait()
+        before = observe()
+        results = []
+        writer = threading.Thread(target=lambda: results.append(mutate()))
+        writer.start()
+        writer.join(0.1)
+        try:
+            assert observe() == before
+        finally:
+            release.set()
+            writer.join()
+            flusher.join()
+        assert observe() != before
+        return results[0]
+    return check
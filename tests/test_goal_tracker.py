@@ -0,0 +1,62 @@
+import os
+import pytest
+from modules.goals.goal_tracker import GoalTracker
+
+def populate(tracker):
+    first = tracker.create_goal("Run a marathon", category="Fitness", priority="high")
+    second = tracker.create_goal("Save money", category="Financial", measurable=True, target_value=1000)
+    third = tracker.create_goal("Learn Rust", category="Learning")
+    
+    tracker.add_milestone(first, "10k")
+    tracker.add_milestone(first, "Half marathon")
+    tracker.complete_milestone(first, next(iter(tracker.goals[first]['milestones'])))
+    sub_goal_id = tracker.add_sub_goal(third, "Finish the book")
+    tracker.complete_sub_goal(third, sub_goal_id)
+    tracker.update_progress(second, current_value=250, notes="First deposit")
+    tracker.add_reflection(first, "Knees hold up so far")
+    tracker.archive_goal(third)
+    tracker.delete_goal(tracker.create_goal("Temporary"))
+    return first, second, third
+
+@pytest.mark.unit
+class TestGoalTracker:
+    def test_archive_replays_as_patch(self, store_config):
+        tracker = GoalTracker(store_config())
+        first, _, _ = populate(tracker)
+        tracker.archive_goal(first)
+        
+        with open(tracker.log_path, 'rb') as f:
+            assert f.read().endswith(b'"p":{"status":"archived"}}\n')
+        reloaded = GoalTracker(store_config())
+        assert (reloaded.goals, reloaded.categories) == (tracker.goals, tracker.categories)
+        assert reloaded.get_analytics() == tracker.get_analytics()
+    
+    def test_empty_reflection_is_a_noop(self, store_config):
+        tracker = GoalTracker(store_config())
+        goal_id = tracker.create_goal("Meditate")
+        log_size = os.path.getsize(tracker.log_path)
+        
+        assert tracker.add_reflection(goal_id, "") is True
+        assert tracker.goals[goal_id]['reflections'] == []
+        assert os.path.getsize(tracker.log_path) == log_size
+        assert tracker.add_reflection("missing", "") is False
+    
+    def test_remove_goal_deletes(self, store_config):
+        tracker = GoalTracker(store_config())
+        goal_id = tracker.create_goal("Short lived")
+        
+        assert tracker.remove_goal(goal_id) is True
+        assert tracker.remove_goal(goal_id) is False
+        assert goal_id not in GoalTracker(store_config()).goals
+    
+    def test_goal_views_are_read_only(self, store_config):
+        tracker = GoalTracker(store_config())
+        goal_id = tracker.create_goal("Read more")
+        
+        for view in (tracker.get_goal(goal_id), tracker.update_progress(goal_id, progress=40),
+                     tracker.update_progress(goal_id, progress=40)):
+            assert view['progress'] == 40.0
+            with pytest.raises(TypeError):
+                view['progress'] = 0
+        assert tracker.get_goal("missing") is None
+        assert tracker.update_progress("missing", progress=10) is False
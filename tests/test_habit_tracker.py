@@ -0,0 +1,64 @@
+import os
+import pytest
+from datetime import datetime, timedelta
+from modules.habits.habit_tracker import HabitTracker
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+def populate(tracker):
+    tracker.create_habit("Read", category="learning")
+    tracker.create_habit("Run", frequency="weekly")
+    tracker.create_habit("Stretch")
+    
+    for days in (3, 2, 1, 0):
+        tracker.log_completion("Read", notes=f"day {days}", timestamp=days_ago(days))
+    # Backdated completions land in date order
+    tracker.log_completion("Run", timestamp=days_ago(1))
+    tracker.log_completion("Run", timestamp=days_ago(5))
+    tracker.log_completion("Stretch")
+    tracker.archive_habit("Stretch")
+
+def assert_reloads(tracker, reloaded):
+    assert (reloaded.habits, reloaded.completions, reloaded._log_seq) == \
+           (tracker.habits, tracker.completions, tracker._log_seq)
+    assert reloaded.get_analytics() == tracker.get_analytics()
+    assert reloaded.get_today_summary() == tracker.get_today_summary()
+
+@pytest.mark.unit
+class TestHabitTracker:
+    def test_completions_go_to_the_log(self, store_config):
+        tracker = HabitTracker(store_config())
+        populate(tracker)
+        snapshot_size = os.path.getsize(tracker.storage_path)
+        
+        tracker.log_completion("Read")
+        
+        assert os.path.getsize(tracker.storage_path) == snapshot_size
+        assert tracker._log_seq == 8
+        assert_reloads(tracker, HabitTracker(store_config()))
+    
+    def test_log_left_behind_by_compaction_is_skipped(self, store_config):
+        tracker = HabitTracker(store_config())
+        populate(tracker)
+        tracker.log_completion("Read")
+        with open(tracker.log_path, 'rb') as f:
+            stale_log = f.read()
+        tracker.compact()
+        
+        # The snapshot carries _log_seq, so the replayed completions are skipped
+        with open(tracker.log_path, 'wb') as f:
+            f.write(stale_log)
+        
+        assert_reloads(tracker, HabitTracker(store_config()))
+    
+    def test_habit_changes_rewrite_the_snapshot(self, store_config):
+        tracker = HabitTracker(store_config())
+        populate(tracker)
+        tracker.log_completion("Read")
+        assert os.path.getsize(tracker.log_path) > 0
+        
+        tracker.archive_habit("Run")
+        
+        assert os.path.getsize(tracker.log_path) == 0
+        assert_reloads(tracker, HabitTracker(store_config()))
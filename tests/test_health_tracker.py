@@ -0,0 +1,35 @@
+import pytest
+from datetime import datetime, timedelta
+from modules.health.health_tracker import HealthTracker
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+def populate(tracker):
+    tracker.log_workout("running", 30, calories=300, distance=5.0, date=days_ago(1))
+    tracker.log_workout("yoga", 45, notes="evening")
+    tracker.log_measurement("weight", 72.5, "kg", date=days_ago(3))
+    tracker.add_weight_entry(72.1)
+    tracker.log_sleep(7.5, quality="good", date=days_ago(2)[:10])
+    tracker.log_sleep(6)
+    tracker.log_mood("calm", 7)
+    tracker.log_mood("tired", 14, date=days_ago(1))
+    tracker.set_health_goal("weight", 70, "kg")
+
+@pytest.mark.unit
+class TestHealthTracker:
+    def test_summaries_rebuild_on_reload(self, store_config):
+        tracker = HealthTracker(store_config())
+        populate(tracker)
+        
+        reloaded = HealthTracker(store_config())
+        assert reloaded.get_summary() == tracker.get_summary()
+        assert reloaded.get_measurement_history('weight') == tracker.get_measurement_history('weight')
+        assert [m['value'] for m in tracker.get_measurement_history('weight')] == [72.1, 72.5]
+    
+    def test_log_water_reports_success(self, store_config):
+        tracker = HealthTracker(store_config())
+        
+        assert tracker.log_water(250) is True
+        assert tracker.log_water(500) is True
+        assert HealthTracker(store_config()).get_today_water()['total'] == 750
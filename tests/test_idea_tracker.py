@@ -0,0 +1,44 @@
+import pytest
+from modules.ideas.idea_tracker import IdeaTracker
+
+def populate(tracker):
+    board_id = tracker.create_board("Side projects", color="blue")
+    first = tracker.add_idea("Garden sensor", "Soil moisture over LoRa", category="hardware",
+                             tags=["iot", "garden"], board_id=board_id)['id']
+    second = tracker.add_idea("Recipe search", tags=["web"], priority="high")['id']
+    third = tracker.add_idea("Throwaway")['id']
+    
+    tracker.add_note_to_idea(first, "Check battery life")
+    tracker.rate_idea(first, 8, feasibility="high", effort="medium")
+    tracker.update_idea_status(second, "exploring")
+    tracker.link_ideas(first, second)
+    tracker.toggle_favorite(second)
+    tracker.archive_idea(third)
+    tracker.delete_idea(tracker.add_idea("Deleted")['id'])
+    return first, second, third
+
+@pytest.mark.unit
+class TestIdeaTracker:
+    def test_search_and_stats_after_reload(self, store_config):
+        tracker = IdeaTracker(store_config())
+        first, second, _ = populate(tracker)
+        
+        reloaded = IdeaTracker(store_config())
+        assert [idea['id'] for idea in reloaded.search_ideas("sensor")] == [first]
+        assert reloaded.search_ideas("sensor") == tracker.search_ideas("sensor")
+        assert reloaded.get_stats() == tracker.get_stats()
+        assert [idea['id'] for idea in reloaded.get_favorites()] == [second]
+    
+    def test_index_lookups_keep_idea_order(self, store_config):
+        tracker = IdeaTracker(store_config())
+        board_id = tracker.create_board("Weekend")
+        ids = [tracker.add_idea(f"Idea {i}", tags=["later"], board_id=board_id)['id'] for i in range(4)]
+        # Favorited newest first, so the favorites index holds them in reverse
+        for idea_id in reversed(ids):
+            tracker.toggle_favorite(idea_id)
+        tracker.add_idea("Unrelated")
+        
+        for reader in (tracker, IdeaTracker(store_config())):
+            for ideas in (reader.get_favorites(), reader.get_ideas_by_tag("later"),
+                          reader.get_board_ideas(board_id)):
+                assert [idea['id'] for idea in ideas] == ids
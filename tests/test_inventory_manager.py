@@ -0,0 +1,46 @@
+import pytest
+from modules.inventory.inventory_manager import InventoryManager
+
+def populate(manager):
+    manager.add_location("Garage", "Detached")
+    laptop = manager.add_item("Laptop", category="Electronics", location="Office", purchase_price=1200.0,
+                              warranty_expiry="2030-01-01", serial_number="SN123", model="X1")['id']
+    drill = manager.add_item("Drill", category="Power Tools", location="Garage", quantity=2,
+                             purchase_price=80.0)['id']
+    manager.add_item("Bookshelf", category="Furniture", location="Office")
+    manager.delete_item(manager.add_item("Broken lamp", category="Lighting")['id'])
+    return laptop, drill
+
+def assert_reloads(manager, reloaded):
+    assert (reloaded.items, reloaded.locations, reloaded.categories) == \
+           (manager.items, manager.locations, manager.categories)
+    assert reloaded.get_stats() == manager.get_stats()
+    assert reloaded.get_value_by_location() == manager.get_value_by_location()
+    assert reloaded.search_items("sn123") == manager.search_items("sn123")
+
+@pytest.mark.unit
+class TestInventoryManager:
+    def test_field_updates_replay_as_patches(self, store_config):
+        manager = InventoryManager(store_config())
+        laptop, drill = populate(manager)
+        manager.update_item(laptop, location="Garage", condition="worn")
+        manager.update_item(drill, quantity=3, notes="Spare battery")
+        
+        with open(manager.log_path, 'rb') as f:
+            assert b'"p":' in f.read()
+        assert_reloads(manager, InventoryManager(store_config()))
+        assert [item['id'] for item in manager.search_items("sn123")] == [laptop]
+    
+    def test_rejected_update_leaves_item_and_stats(self, store_config):
+        manager = InventoryManager(store_config())
+        laptop, drill = populate(manager)
+        stats = manager.get_stats()
+        
+        assert manager.update_item(drill, quantity='x') is False
+        assert manager.update_item(laptop, category=['not', 'hashable'], notes="Dropped") is False
+        assert manager.add_item("Kettle", purchase_price='cheap') is None
+        
+        assert manager.items[drill]['quantity'] == 2
+        assert manager.items[laptop]['notes'] == ""
+        assert manager.get_stats() == stats
+        assert_reloads(manager, InventoryManager(store_config()))
@@ -0,0 +1,31 @@
+import pytest
+from datetime import datetime, timedelta
+from modules.journal.journal import JournalSystem
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+def populate(journal):
+    first = journal.create_entry("Walked along the river", title="Morning", mood="calm",
+                                 tags=["outdoors"], date=days_ago(1))
+    second = journal.create_entry("Long day at work", mood="tired", tags=["work", "stress"])
+    journal.create_entry("Backdated thoughts", date=days_ago(10))
+    journal.delete_entry(journal.create_entry("Scrapped draft"))
+    journal.add_custom_prompt("wins", "What went well this week?")
+    return first, second
+
+@pytest.mark.unit
+class TestJournalSystem:
+    def test_field_updates_replay_as_patches(self, store_config):
+        journal = JournalSystem(store_config())
+        first, second = populate(journal)
+        journal.update_entry(first, content="Walked along the river at dawn", tags=["outdoors", "sunrise"])
+        journal.toggle_favorite(second)
+        
+        with open(journal.log_path, 'rb') as f:
+            assert b'"p":' in f.read()
+        reloaded = JournalSystem(store_config())
+        assert (reloaded.entries, reloaded.prompts, reloaded.tags) == (journal.entries, journal.prompts, journal.tags)
+        assert reloaded.get_analytics() == journal.get_analytics()
+        assert reloaded.search_entries("river") == journal.search_entries("river")
+
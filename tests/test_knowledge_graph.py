@@ -0,0 +1,176 @@
+import gzip
+import random
+import pytest
+from modules.knowledge_graph.knowledge_graph_manager import KnowledgeGraphManager
+
+def populate(graph):
+    graph.add_entity("Alice", "person", {"role": "engineer"})
+    graph.add_entity("Bob", "person")
+    graph.add_entity("Acme", "company")
+    graph.add_entity("Python", "language")
+    graph.add_relationship("Alice", "works_at", "Acme")
+    graph.add_relationship("Bob", "works_at", "Acme")
+    graph.add_relationship("Acme", "uses", "Python")
+
+def assert_reloads(graph, reloaded):
+    assert (reloaded.entities, reloaded.relationships, reloaded.entity_types, reloaded.relationship_types) == \
+           (graph.entities, graph.relationships, graph.entity_types, graph.relationship_types)
+    assert reloaded.get_relationships("Alice") == graph.get_relationships("Alice")
+    assert reloaded.find_path("Alice", "Python") == graph.find_path("Alice", "Python")
+
+@pytest.mark.unit
+class TestKnowledgeGraphPersistence:
+    def test_gzip_round_trip(self, store_config, tmp_path):
+        config = store_config(storage_path=str(tmp_path / 'knowledge_graph.json.gz'))
+        graph = KnowledgeGraphManager(config)
+        populate(graph)
+        
+        with open(config['storage_path'], 'rb') as f:
+            assert gzip.decompress(f.read()).startswith(b'{')
+        assert_reloads(graph, KnowledgeGraphManager(config))
+    
+    def test_debounced_save(self, store_config):
+        graph = KnowledgeGraphManager(store_config(save_interval=60))
+        populate(graph)
+        
+        assert graph._save_timer is not None
+        assert KnowledgeGraphManager(store_config()).entities == {}
+        graph.flush()
+        assert graph._save_timer is None
+        assert_reloads(graph, KnowledgeGraphManager(store_config()))
+    
+    def test_mutations_wait_for_a_flush(self, store_config, assert_waits_for_flush):
+        graph = KnowledgeGraphManager(store_config(save_interval=60))
+        
+        assert assert_waits_for_flush(graph, lambda: graph.add_entity("Alice", "person"),
+                                      lambda: len(graph.entities)) is True
+        assert assert_waits_for_flush(graph, lambda: graph.delete_entity("Alice"),
+                                      lambda: len(graph.entities)) is True
+
+def scan_relationships(graph, entity_id):
+    # Relationships touching entity_id, found by scanning every edge
+    return [rel for rel in graph.relationships if entity_id in (rel['from'], rel['to'])]
+
+def shortest_length(graph, from_id, to_id):
+    # Plain BFS over every edge, for comparison with find_path
+    depth = {from_id: 0}
+    queue = [from_id]
+    for node_id in queue:
+        if node_id == to_id:
+            return depth[node_id]
+        for rel in graph.relationships:
+            if rel['from'] == node_id and rel['to'] not in depth:
+                depth[rel['to']] = depth[node_id] + 1
+                queue.append(rel['to'])
+    return None
+
+def chain(graph, *names):
+    for name in names:
+        graph.add_entity(name, "node")
+    for from_name, to_name in zip(names, names[1:]):
+        graph.add_relationship(from_name, "next", to_name)
+
+@pytest.mark.unit
+class TestKnowledgeGraphIndexes:
+    def test_delete_entity_trims_neighbour_adjacency(self, store_config):
+        graph = KnowledgeGraphManager(store_config())
+        populate(graph)
+        graph.add_relationship("Alice", "knows", "Bob")
+        graph.add_relationship("Python", "used_by", "Alice")
+        graph.add_relationship("Acme", "owns", "Acme")
+        
+        assert graph.delete_entity("Acme") is True
+        
+        assert all('company_acme' not in (rel['from'], rel['to']) for rel in graph.relationships)
+        for index in (graph._out_adj, graph._in_adj, graph._incident):
+            assert 'company_acme' not in index
+            for rels in index.values():
+                assert rels
+                assert all('company_acme' not in (rel['from'], rel['to']) for rel in rels)
+        for entity_id in graph.entities:
+            assert graph._incident.get(entity_id, []) == scan_relationships(graph, entity_id)
+        
+        assert graph.get_relationships("Alice") == [
+            {'direction': 'outgoing', 'type': 'knows', 'entity': 'Bob', 'entity_type': 'person', 'properties': {}},
+            {'direction': 'incoming', 'type': 'used_by', 'entity': 'Python', 'entity_type': 'language',
+             'properties': {}},
+        ]
+        assert graph.get_relationships("Bob", direction='from') == []
+        assert graph.get_relationships("Python", direction='to') == []
+    
+    def test_find_path_respects_max_depth(self, store_config):
+        graph = KnowledgeGraphManager(store_config())
+        chain(graph, "A", "B", "C", "D")
+        
+        assert graph.find_path("A", "D", max_depth=3) is None
+        assert graph.find_path("A", "D", max_depth=4) == [
+            {'from': 'A', 'type': 'next', 'to': 'B'},
+            {'from': 'B', 'type': 'next', 'to': 'C'},
+            {'from': 'C', 'type': 'next', 'to': 'D'},
+        ]
+        assert graph.find_path("A", "B", max_depth=1) is None
+        assert graph.find_path("A", "A", max_depth=1) == []
+        assert graph.find_path("A", "A", max_depth=0) is None
+        assert graph.find_path("D", "A", max_depth=10) is None
+    
+    def test_find_path_takes_the_shortcut(self, store_config):
+        graph = KnowledgeGraphManager(store_config())
+        chain(graph, "A", "B", "C", "D")
+        graph.add_relationship("B", "skip", "D")
+        
+        assert graph.find_path("A", "D") == [
+            {'from': 'A', 'type': 'next', 'to': 'B'},
+            {'from': 'B', 'type': 'skip', 'to': 'D'},
+        ]
+    
+    def test_find_path_matches_plain_bfs(self, store_config, tmp_path):
+        rng = random.Random(7)
+        for trial in range(30):
+            graph = KnowledgeGraphManager(store_config(storage_path=str(tmp_path / f'graph_{trial}.json')))
+            names = [f"n{i}" for i in range(rng.randint(2, 12))]
+            for name in names:
+                graph.add_entity(name, "node")
+            for _ in range(rng.randint(0, 25)):
+                graph.add_relationship(rng.choice(names), "edge", rng.choice(names))
+            if rng.random() < 0.5:
+                graph.delete_entity(rng.choice(names[1:]))
+            
+            ids = list(graph.entities)
+            for _ in range(10):
+                from_id, to_id = rng.choice(ids), rng.choice(ids)
+                max_depth = rng.randint(0, 6)
+                length = shortest_length(graph, from_id, to_id)
+                path = graph.find_path(graph.entities[from_id]['name'], graph.entities[to_id]['name'],
+                                       max_depth=max_depth)
+                
+                if length is None or length >= max_depth:
+                    assert path is None
+                    continue
+                assert len(path) == length
+                current = graph.entities[from_id]['name']
+                for step in path:
+                    assert step['from'] == current
+                    current = step['to']
+                assert current == graph.entities[to_id]['name']
+    
+    def test_name_index_after_case_collision(self, store_config):
+        graph = KnowledgeGraphManager(store_config())
+        graph.add_entity("Python", "language")
+        graph.add_entity("python", "snake")
+        graph.add_entity("Bob Smith", "person")
+        
+        # Same ids as before, so the entities keep their slots in self.entities
+        graph.add_entity("PYTHON", "language")
+        graph.add_entity("bob_smith", "person")
+        
+        assert graph.get_entity("python")['id'] == 'language_python'
+        assert graph.get_entity("Python")['name'] == 'PYTHON'
+        assert graph.get_entity("Bob Smith") is None
+        assert graph.get_entity("BOB_SMITH")['id'] == 'person_bob_smith'
+        
+        # Same answers as a scan over the entities in order
+        reloaded = KnowledgeGraphManager(store_config())
+        for name in ("python", "bob smith", "bob_smith", "missing"):
+            expected = next((e['id'] for e in graph.entities.values() if e['name'].lower() == name), None)
+            assert graph._find_entity_id(name) == expected
+            assert reloaded._find_entity_id(name) == expected
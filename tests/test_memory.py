@@ -0,0 +1,47 @@
+import pytest
+from modules.learning import LearningManager
+from modules.learning.memory import Memory
+
+@pytest.fixture
+def memory_config(store_config, tmp_path):
+    def config(**overrides):
+        return store_config(memory_file=str(tmp_path / 'memory.json'),
+                            conversation_history=str(tmp_path / 'conversations.json'), **overrides)
+    return config
+
+@pytest.mark.unit
+class TestMemoryPersistence:
+    def test_learned_patterns_are_saved(self, memory_config):
+        memory = Memory(memory_config())
+        memory.learn_pattern("good morning")
+        memory.learn_pattern("good morning")
+        
+        assert Memory(memory_config()).get_pattern_frequency("good morning") == 2
+    
+    def test_learned_patterns_schedule_a_save(self, memory_config):
+        memory = Memory(memory_config(save_interval=60))
+        memory.learn_pattern("weather")
+        
+        assert memory._save_timer is not None
+        memory.flush()
+        assert Memory(memory_config()).get_pattern_frequency("weather") == 1
+    
+    def test_interactions_leave_writes_to_the_timer(self, memory_config):
+        learning = LearningManager(memory_config(save_interval=60))
+        learning.process_interaction("good morning", "Morning!")
+        learning.process_interaction("good night", "Night!")
+        
+        assert learning.memory._save_timer is not None
+        assert Memory(memory_config()).conversations == []
+        learning.memory.flush()
+        reloaded = Memory(memory_config())
+        assert len(reloaded.conversations) == 2
+        assert reloaded.get_pattern_frequency("good") == 2
+    
+    def test_mutations_wait_for_a_flush(self, memory_config, assert_waits_for_flush):
+        memory = Memory(memory_config(save_interval=60))
+        
+        assert_waits_for_flush(memory, lambda: memory.remember("city", "Lisbon"),
+                               lambda: len(memory.memory))
+        assert_waits_for_flush(memory, lambda: memory.add_conversation("hi", "hello"),
+                               lambda: len(memory.conversations))
@@ -0,0 +1,303 @@
+import gzip
+import os
+import threading
+import pytest
+from modules.tracker_base import LogStore, locked, memoized, read_file, write_file
+
+class Shelf(LogStore):
+    """Smallest LogStore: books by key, a set of labels and numbered loan events."""
+    _collections = ('books', 'labels')
+    _set_collections = ('labels',)
+    
+    def __init__(self, config):
+        self.books = {}
+        self.labels = set()
+        self.loans = []
+        self._init_store(config, 'shelf', 0)
+        self._load_store()
+    
+    def _apply_snapshot(self, data):
+        self.books = data.get('books', {})
+        self.labels = set(data.get('labels', []))
+        self.loans = data.get('loans', [])
+        self._log_seq = data.get('log_seq', 0)
+    
+    def _snapshot_payload(self):
+        return {'books': self.books, 'labels': sorted(self.labels), 'loans': self.loans,
+                'log_seq': self._log_seq}
+    
+    def _apply_event(self, record):
+        self.loans.append(record['b'])
+    
+    @locked
+    def add_book(self, key, title):
+        self.books[key] = {'title': title, 'shelf': 1}
+        self._mark_dirty('books', key)
+        return True
+    
+    @locked
+    def move_book(self, key, shelf):
+        self.books[key]['shelf'] = shelf
+        self._mark_dirty('books', key, fields=['shelf'])
+    
+    @locked
+    def remove_book(self, key):
+        del self.books[key]
+        self._mark_dirty('books', key)
+    
+    @locked
+    def label(self, name, on=True):
+        (self.labels.add if on else self.labels.discard)(name)
+        self._mark_dirty('labels', name)
+    
+    @locked
+    def lend(self, key):
+        self.loans.append(key)
+        self._log_event({'b': key})
+    
+    @locked
+    def rebuild(self):
+        self._mark_snapshot()
+
+def populate(shelf):
+    for key in ('dune', 'emma', 'ulysses'):
+        shelf.add_book(key, key.title())
+    shelf.move_book('emma', 3)
+    shelf.remove_book('ulysses')
+    shelf.label('classics')
+    shelf.label('loaned')
+    shelf.label('loaned', on=False)
+    shelf.lend('dune')
+    shelf.lend('emma')
+
+def assert_same_shelf(shelf, reloaded):
+    assert (reloaded.books, reloaded.labels, reloaded.loans, reloaded._log_seq) == \
+           (shelf.books, shelf.labels, shelf.loans, shelf._log_seq)
+
+@pytest.mark.unit
+class TestLogStore:
+    def test_round_trip(self, store_config):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        
+        assert os.path.getsize(shelf.log_path) > 0
+        assert_same_shelf(shelf, Shelf(store_config()))
+    
+    def test_field_updates_replay_as_patches(self, store_config):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        shelf.move_book('dune', 2)
+        
+        with open(shelf.log_path, 'rb') as f:
+            assert f.read().endswith(b'{"c":"books","k":"dune","p":{"shelf":2}}\n')
+        assert_same_shelf(shelf, Shelf(store_config()))
+    
+    def test_torn_trailing_log_record(self, store_config):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        log_size = os.path.getsize(shelf.log_path)
+        
+        with open(shelf.log_path, 'ab') as f:
+            f.write(b'{"c":"books","k":"torn","v":{"title":')
+        
+        reloaded = Shelf(store_config())
+        assert_same_shelf(shelf, reloaded)
+        assert os.path.getsize(shelf.log_path) == log_size
+        
+        reloaded.add_book('walden', 'Walden')
+        assert_same_shelf(reloaded, Shelf(store_config()))
+    
+    def test_appends_after_compaction(self, store_config):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        shelf.compact()
+        assert os.path.getsize(shelf.log_path) == 0
+        
+        shelf.move_book('dune', 4)
+        shelf.lend('emma')
+        assert os.path.getsize(shelf.log_path) > 0
+        
+        assert_same_shelf(shelf, Shelf(store_config()))
+    
+    def test_automatic_compaction(self, store_config):
+        shelf = Shelf(store_config(compact_ratio=0.05))
+        populate(shelf)
+        shelf.compact()
+        for shelf_number in range(20):
+            shelf.move_book('dune', shelf_number)
+        
+        assert os.path.getsize(shelf.log_path) < os.path.getsize(shelf.storage_path)
+        assert_same_shelf(shelf, Shelf(store_config(compact_ratio=0.05)))
+    
+    def test_first_append_without_a_snapshot_compacts(self, store_config):
+        shelf = Shelf(store_config())
+        shelf.add_book('dune', 'Dune')
+        
+        assert os.path.getsize(shelf.storage_path) > 0
+        assert os.path.getsize(shelf.log_path) == 0
+    
+    def test_snapshot_changes_skip_the_log(self, store_config):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        assert os.path.getsize(shelf.log_path) > 0
+        
+        shelf.rebuild()
+        
+        assert os.path.getsize(shelf.log_path) == 0
+        assert_same_shelf(shelf, Shelf(store_config()))
+    
+    def test_log_left_behind_by_compaction_is_skipped(self, store_config):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        with open(shelf.log_path, 'rb') as f:
+            stale_log = f.read()
+        shelf.compact()
+        
+        # As if the process died between the snapshot rename and the log truncate
+        with open(shelf.log_path, 'wb') as f:
+            f.write(stale_log)
+        
+        assert_same_shelf(shelf, Shelf(store_config()))
+    
+    def test_snapshot_is_compact(self, store_config):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        shelf.compact()
+        
+        with open(shelf.storage_path, 'rb') as f:
+            snapshot = f.read()
+        assert b'\n' not in snapshot
+        assert b'": ' not in snapshot
+    
+    def test_msgpack_migration(self, store_config, tmp_path):
+        pytest.importorskip('msgpack')
+        shelf = Shelf(store_config())
+        populate(shelf)
+        
+        msgpack_config = store_config(storage_format='msgpack', storage_path=str(tmp_path / 'store.msgpack'))
+        migrated = Shelf(msgpack_config)
+        assert_same_shelf(shelf, migrated)
+        assert not os.path.exists(shelf.storage_path)
+        assert not os.path.exists(shelf.log_path)
+        
+        migrated.move_book('emma', 5)
+        assert_same_shelf(migrated, Shelf(msgpack_config))
+    
+    def test_compaction_syncs_directory_before_truncating(self, store_config, monkeypatch):
+        shelf = Shelf(store_config())
+        populate(shelf)
+        events = []
+        real_fsync = os.fsync
+        real_open = open
+        
+        def fsync(fd):
+            events.append('fsync-dir' if os.path.isdir(f'/proc/self/fd/{fd}') else 'fsync')
+            real_fsync(fd)
+        
+        def tracking_open(path, mode='r', *args, **kwargs):
+            if path == shelf.log_path and mode == 'w':
+                events.append('truncate')
+            return real_open(path, mode, *args, **kwargs)
+        
+        monkeypatch.setattr(os, 'fsync', fsync)
+        monkeypatch.setattr('builtins.open', tracking_open)
+        shelf.compact()
+        
+        assert events.index('fsync-dir') < events.index('truncate')
+    
+    def test_log_batches_are_synced_once(self, store_config, monkeypatch):
+        shelf = Shelf(store_config(save_interval=60, compact_ratio=100))
+        populate(shelf)
+        shelf.compact()
+        synced = []
+        real_fsync = os.fsync
+        
+        def fsync(fd):
+            synced.append(os.readlink(f'/proc/self/fd/{fd}'))
+            real_fsync(fd)
+        
+        monkeypatch.setattr(os, 'fsync', fsync)
+        shelf.move_book('dune', 2)
+        shelf.move_book('emma', 4)
+        shelf.lend('dune')
+        shelf.flush()
+        
+        assert synced == [os.path.realpath(shelf.log_path)]
+    
+    def test_debounced_save(self, store_config):
+        shelf = Shelf(store_config(save_interval=60))
+        populate(shelf)
+        
+        assert shelf._save_timer is not None
+        assert Shelf(store_config()).books == {}
+        shelf.flush()
+        assert shelf._save_timer is None
+        assert_same_shelf(shelf, Shelf(store_config()))
+    
+    def test_mutations_wait_for_a_flush(self, store_config, assert_waits_for_flush):
+        shelf = Shelf(store_config(save_interval=60))
+        
+        assert assert_waits_for_flush(shelf, lambda: shelf.add_book('dune', 'Dune'),
+                                      lambda: len(shelf.books)) is True
+        assert_waits_for_flush(shelf, lambda: shelf.lend('dune'), lambda: len(shelf.loans))
+
+class CountingShelf(Shelf):
+    """Shelf with a memoized read that can be held open mid-computation."""
+    
+    def __init__(self, config):
+        self._read_cache = {}
+        self.counted = threading.Event()
+        self.finish = threading.Event()
+        self.finish.set()
+        super().__init__(config)
+    
+    def _mark_dirty(self, collection, *keys, fields=None):
+        with self._save_lock:
+            self._read_cache.clear()
+            super()._mark_dirty(collection, *keys, fields=fields)
+    
+    @memoized
+    def count(self):
+        count = len(self.books)
+        self.counted.set()
+        self.finish.wait()
+        return count
+
+@pytest.mark.unit
+class TestMemoized:
+    def test_cached_until_a_mutation(self, store_config):
+        shelf = CountingShelf(store_config())
+        shelf.add_book('dune', 'Dune')
+        
+        assert shelf.count() == 1
+        shelf.books['emma'] = {'title': 'Emma', 'shelf': 1}
+        assert shelf.count() == 1
+        shelf.add_book('walden', 'Walden')
+        assert shelf.count() == 3
+    
+    def test_result_computed_before_a_mutation_is_not_stored(self, store_config):
+        shelf = CountingShelf(store_config())
+        shelf.finish.clear()
+        reader = threading.Thread(target=shelf.count)
+        reader.start()
+        shelf.counted.wait()
+        
+        writer = threading.Thread(target=lambda: shelf.add_book('dune', 'Dune'))
+        writer.start()
+        writer.join(0.1)
+        shelf.finish.set()
+        reader.join()
+        writer.join()
+        
+        assert shelf.count() == 1
+
+@pytest.mark.unit
+class TestFiles:
+    def test_gzip_round_trip(self, tmp_path):
+        path = str(tmp_path / 'store.json.gz')
+        write_file(path, b'{"books":{}}')
+        
+        with open(path, 'rb') as f:
+            assert gzip.decompress(f.read()) == b'{"books":{}}'
+        assert read_file(path) == b'{"books":{}}'
+        assert not os.path.exists(path + '.tmp')